@@ -0,0 +1,936 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for convert.py.
+
+Usage:
+    python bench.py extract [--repeat N] [--verify] statement.pdf [...]
+        Compare the pdfminer XML round trip (extract_text_to_fp + ET.fromstring) with the
+        streaming layout engine: wall time and peak RSS, each measured in a fresh process.
+
+    python bench.py group [--repeat N] statement.pdf|statement.xml [...]
+        Check that the NumPy and pure-Python credit line grouping produce identical rows on the
+        given statements, then time both on the already-extracted pages.
+
+    python bench.py chequing-scaling [--pages 50,100,250,500] [--rows N]
+        Time the chequing block-to-row state machine on synthetic statements of increasing
+        length; per-page cost should stay flat (linear scaling).
+
+    python bench.py memory [--statements N] [--pages P] [--rows R]
+        Parse a synthetic multi-year batch of credit and chequing statements under tracemalloc
+        and report retained and peak memory, next to the size the same transactions take in
+        the previous dict/datetime/list layout.
+
+    python bench.py dates [--tokens N]
+        Resolve N synthetic date cells with the per-statement lookup resolvers and with the
+        previous per-cell dateutil.parse / datetime.strptime code, checking identical results
+        (Dec -> Jan statements included).
+
+    python bench.py tokenizer [--lines 100000]
+        Parse synthetic credit statement lines (transactions, foreign exchange details, lines
+        without amounts, headers) with the single-pass tokenizer and with the previous
+        regex-per-field parser, checking identical transactions, then time both.
+
+    python bench.py generate DIR [--kind visa,chequing] [--format pdf|xml] [--files N] [--pages P] [--rows R]
+        Write a synthetic corpus (one statement per month, named like real downloads) to DIR.
+        PDFs use the statement fonts and, for chequing, the figure table layout, so they go
+        through the same extraction path as real statements.
+
+    python bench.py run [--kind visa,chequing] [--format xml,pdf] [--files 1,10] [--pages 1,10] [--rows 40]
+        For every combination of the comma-separated sizes, convert a synthetic corpus in a
+        fresh process and report files/s, transactions/s, peak RSS and the time spent in each
+        stage (cache, extract, group, parse, write) as --profile records them. Results are saved
+        as JSON (--output).
+
+    python bench.py compare baseline.json candidate.json
+        Throughput and per-stage speedups between two saved `run` results.
+
+Peak RSS comes from /proc (Linux) or resource.getrusage (other Unix); it is reported as n/a on Windows.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from xml.sax.saxutils import escape
+
+import convert
+
+
+def _peak_rss_mb():
+    # Prefer VmHWM on Linux: ru_maxrss can carry over the parent's peak across exec
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _pdf_to_xml_root(pdf_path):
+    """The previous extraction path: render the whole PDF to pdfminer XML and parse it in memory."""
+    import xml.etree.ElementTree as ET
+    from pdfminer.high_level import extract_text_to_fp
+    from pdfminer.layout import LAParams
+
+    output = io.StringIO()
+    with open(pdf_path, 'rb') as f:
+        extract_text_to_fp(f, output, laparams=LAParams(), output_type='xml', codec=None)
+    return ET.fromstring(output.getvalue())
+
+
+def _xml_pages(root):
+    """Adapt an in-memory pdfminer XML tree to page records."""
+    for page_num, page in enumerate(root.iter('page')):
+        yield convert._xml_page_layout(page_num, page)
+
+
+EXTRACT_ENGINES = {
+    'xml': lambda path: _xml_pages(_pdf_to_xml_root(path)),
+    'layout': convert._pdf_pages,
+}
+
+
+def _extract_worker(engine: str, path: str):
+    # Import pdfminer up front so the baseline RSS is comparable between engines
+    import pdfminer.high_level  # noqa: F401
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    pages = 0
+    chars = 0
+    for page in EXTRACT_ENGINES[engine](path):
+        pages += 1
+        chars += len(page.chars)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'engine': engine,
+        'seconds': elapsed,
+        'pages': pages,
+        'chars': chars,
+        'baseline_rss_mb': baseline,
+        'peak_rss_mb': _peak_rss_mb(),
+    }))
+
+
+def _run_worker(*args):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *args],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _format_mb(value):
+    return f"{value:8.1f}" if value is not None else "     n/a"
+
+
+def bench_extract(args):
+    for path in args.files:
+        if args.verify:
+            same = list(EXTRACT_ENGINES['xml'](path)) == list(EXTRACT_ENGINES['layout'](path))
+            print(f"{path}: engines {'produce identical records' if same else 'DIFFER'}")
+            if not same:
+                sys.exit(1)
+
+        print(f"{path}")
+        print(f"  {'engine':<8} {'seconds':>8} {'pages':>6} {'chars':>9} {'base MB':>8} {'peak MB':>8}")
+        for engine in EXTRACT_ENGINES:
+            runs = [_run_worker('_extract-worker', engine, path) for _ in range(args.repeat)]
+            best = min(runs, key=lambda r: r['seconds'])
+            print(f"  {engine:<8} {best['seconds']:8.3f} {best['pages']:6d} {best['chars']:9d} "
+                  f"{_format_mb(best['baseline_rss_mb'])} {_format_mb(best['peak_rss_mb'])}")
+
+
+def bench_group(args):
+    import numpy  # noqa: F401  (the NumPy path is what is being measured)
+
+    pages = []
+    for path in args.files:
+        pages.extend(convert._iter_pages(path))
+    chars = sum(len(page.chars) for page in pages)
+
+    impls = {'python': convert._page_lines_python, 'numpy': convert._page_lines_numpy}
+    results = {name: [impl(page.chars) for page in pages] for name, impl in impls.items()}
+    if results['python'] != results['numpy']:
+        for page, expected, got in zip(pages, results['python'], results['numpy']):
+            if expected != got:
+                print(f"Rows differ on page {page.number}: {expected[:3]} != {got[:3]}")
+                break
+        sys.exit(1)
+    print(f"{len(args.files)} file(s), {len(pages)} pages, {chars} fragments: rows identical")
+
+    for name, impl in impls.items():
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for page in pages:
+                impl(page.chars)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"  {name:<8} {best:8.3f}s  {chars / best / 1e6:6.2f}M fragments/s")
+
+
+FONT_BOOK = "AAAAAA+MetaBookLF-Roman"
+FONT_BOLD = "AAAAAA+MetaBoldLF-Roman"
+CHAR_WIDTH = 5.0
+SPACE_WIDTH = 2.0
+CHEQUING_COLUMNS = (40.0, 100.0, 310.0, 390.0, 470.0)
+MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+MERCHANTS = ["AMAZON.CA MKTP", "TIM HORTONS #1234", "PAYMENT - THANK YOU", "NETFLIX.COM",
+             "SHELL C12345 TORONTO ON", "UBER *TRIP", "LOBLAWS #1021", "SPOTIFY P1A2B3"]
+
+
+def _chequing_statement(pages, rows_per_page, seed=0, year=2023, month=12):
+    """
+    Synthetic chequing statement content: for each page, its table rows as (cells, font). The
+    opening balance is on the 10th of `month` (1-12); December statements cross the year boundary.
+    """
+    rng = random.Random(seed)
+    opening = day = date(year, month, 10)
+    balance = 1000.0
+    total_rows = pages * rows_per_page
+    row_index = 0
+    statement = []
+    for page in range(pages):
+        rows = []
+        if page == 0:
+            rows.append((["Account Summary"], FONT_BOLD))
+            rows.append(([f"Your opening balance on {day:%B} {day.day}, {day.year}"], FONT_BOOK))
+        rows.append((["Date", "Description", "Withdrawals ($)", "Deposits ($)", "Balance ($)"], FONT_BOLD))
+        if page == 0:
+            rows.append((["", "Opening Balance", "", "", f"{balance:,.2f}"], FONT_BOOK))
+        for _ in range(rows_per_page):
+            # Spread the dates over ~10 weeks however long the statement is: the parser
+            # resolves "DD Mon" against the opening balance year, so stay within a year
+            # and clear of Feb 29.
+            label = ''
+            if rng.random() < 0.6:
+                day = opening + timedelta(days=row_index * 70 // total_rows)
+                label = f"{day.day:02d} {day:%b}"
+            row_index += 1
+            amount = rng.randint(100, 50000) / 100
+            if rng.random() < 0.5:
+                balance -= amount
+                cells = [label, rng.choice(["Hydro bill", "e-Transfer", "Monthly fee"]), f"{amount:,.2f}", ""]
+            else:
+                balance += amount
+                cells = [label, rng.choice(["Payroll", "Deposit", "Interest"]), "", f"{amount:,.2f}"]
+            cells.append(f"{balance:,.2f}" if rng.random() < 0.5 else "")
+            rows.append((cells, FONT_BOOK))
+        statement.append(rows)
+    return statement
+
+
+def _credit_statement(pages, rows_per_page, seed=0, year=2023, month=12):
+    """
+    Synthetic Visa statement content: for each page, its text lines. The STATEMENT FROM header
+    covers `month` (1-12) into the following month, so December statements cross the year boundary.
+    """
+    rng = random.Random(seed)
+    start_mon = month - 1
+    end_mon = month % 12
+    end_year = year + 1 if end_mon == 0 else year
+    statement = []
+    for page in range(pages):
+        lines = []
+        if page == 0:
+            lines.append(f"STATEMENT FROM {MONTHS[start_mon]} 15, {year} TO {MONTHS[end_mon]} 14, {end_year}")
+        for _ in range(rows_per_page):
+            mon = MONTHS[rng.choice((start_mon, end_mon))]
+            day = rng.randint(1, 27)
+            amount = rng.randint(100, 300000) / 100
+            sign = '-' if rng.random() < 0.1 else ''
+            line = f"{mon} {day:02d}{mon} {day + rng.randint(0, 1):02d} {rng.choice(MERCHANTS)} {sign}${amount:,.2f}"
+            if rng.random() < 0.1:
+                line += f" Foreign Currency-USD {amount / 1.35:.2f} Exchange rate-1.{rng.randint(3000, 3999)}"
+            lines.append(line)
+        statement.append(lines)
+    return statement
+
+
+def _xml_char(font, x, y, c, size=9.0):
+    return (f'<text font="{font}" bbox="{x:.3f},{y:.3f},{x + CHAR_WIDTH:.3f},{y + size:.3f}" '
+            f'colourspace="DeviceGray" ncolour="0" size="{size:.3f}">{escape(c)}</text>\n')
+
+
+def _chequing_row_xml(cells, y, font):
+    """One table row in a statement figure: characters per cell, each cell closed by a rule."""
+    out = []
+    for x, text in zip(CHEQUING_COLUMNS, cells):
+        if not text:
+            continue
+        x += 2.0
+        for c in text:
+            if c != ' ':
+                out.append(_xml_char(font, x, y, c))
+            x += CHAR_WIDTH if c != ' ' else SPACE_WIDTH
+        out.append(f'<line linewidth="0" bbox="{x:.3f},{y:.3f},{x:.3f},{y + 9:.3f}" />\n')
+    out.append(f'<rect linewidth="0" bbox="0.000,{y - 2:.3f},600.000,{y - 2:.3f}" />\n')
+    return out
+
+
+def write_chequing_xml(path, pages, rows_per_page, seed=0, year=2023, month=12):
+    """Write a synthetic pdfminer-style XML chequing statement (figure layout, Meta fonts)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" ?>\n<pages>\n')
+        for page, rows in enumerate(_chequing_statement(pages, rows_per_page, seed, year, month)):
+            f.write(f'<page id="{page + 1}" bbox="0.000,0.000,612.000,792.000" rotate="0">\n')
+            f.write('<textbox id="0" bbox="0.000,0.000,1.000,1.000" />\n')
+            f.write('<figure name="Fm0" bbox="0.000,0.000,612.000,792.000">\n')
+            out = []
+            for n, (cells, font) in enumerate(rows):
+                out += _chequing_row_xml(cells, 760.0 - 12 * n, font)
+            f.write(''.join(out))
+            f.write('</figure>\n</page>\n')
+        f.write('</pages>\n')
+
+
+def _credit_line_xml(text, y, size=9.0):
+    """One text line as pdfminer writes it: a <textline> of characters, spaces included."""
+    out = ['<textline bbox="40.000,0.000,600.000,0.000">\n']
+    x = 40.0
+    for c in text:
+        out.append(_xml_char(FONT_BOOK, x, y, c, size))
+        x += CHAR_WIDTH
+    out.append('<text>\n</text>\n</textline>\n')
+    return out
+
+
+def write_credit_xml(path, pages, rows_per_page, seed=0, year=2023, month=12):
+    """Write a synthetic pdfminer-style XML Visa statement (see _credit_statement)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" ?>\n<pages>\n')
+        for page, lines in enumerate(_credit_statement(pages, rows_per_page, seed, year, month)):
+            f.write(f'<page id="{page + 1}" bbox="0.000,0.000,612.000,792.000" rotate="0">\n')
+            f.write('<textbox id="0" bbox="40.000,0.000,600.000,792.000">\n')
+            out = []
+            for n, line in enumerate(lines):
+                out += _credit_line_xml(line, 750.0 - 12 * n)
+            f.write(''.join(out))
+            f.write('</textbox>\n</page>\n')
+        f.write('</pages>\n')
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _pdf_words(font, x, y, text, size=9):
+    """Content-stream operators drawing `text` word by word, spaced like the XML generator."""
+    out = []
+    for word in text.split(' '):
+        if word:
+            out.append(f"BT /{font} {size} Tf {x:.2f} {y:.2f} Td ({_pdf_escape(word)}) Tj ET\n")
+        x += CHAR_WIDTH * len(word) + SPACE_WIDTH
+    return ''.join(out), x - SPACE_WIDTH
+
+
+def _write_pdf(path, pages):
+    """
+    Write a minimal uncompressed PDF. `pages` holds (content, form) operator strings per page;
+    a form, when given, is drawn as a Form XObject so pdfminer reports it as the page figure.
+    Both statement fonts are declared as fixed-width Type1 fonts with no embedded program.
+    """
+    objects = [None, None]  # catalog and page tree, filled in at the end
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    def stream(data, entries=''):
+        data = data.encode('latin-1')
+        return b'<< ' + entries.encode() + b' /Length %d >>\nstream\n' % len(data) + data + b'\nendstream'
+
+    widths = ' '.join([str(round(CHAR_WIDTH / 9 * 1000))] * 95)
+    fonts = []
+    for name, base in (('F1', FONT_BOOK), ('F2', FONT_BOLD)):
+        # pdfminer takes the character font name from the descriptor
+        descriptor = add(f"<< /Type /FontDescriptor /FontName /{base} /Flags 32 /FontBBox [0 0 1000 1000] "
+                         f"/ItalicAngle 0 /Ascent 1000 /Descent 0 /CapHeight 700 /StemV 80 >>")
+        ref = add(f"<< /Type /Font /Subtype /Type1 /BaseFont /{base} /FirstChar 32 /LastChar 126 "
+                  f"/Widths [{widths}] /Encoding /WinAnsiEncoding /FontDescriptor {descriptor} 0 R >>")
+        fonts.append(f"/{name} {ref} 0 R")
+    font_dict = ' '.join(fonts)
+    resources = f"<< /Font << {font_dict} >> >>"
+    kids = []
+    for content, form in pages:
+        page_resources = resources
+        if form is not None:
+            form_ref = add(stream(form, f"/Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources {resources}"))
+            page_resources = f"<< /Font << {font_dict} >> /XObject << /Fm0 {form_ref} 0 R >> >>"
+            content = "q /Fm0 Do Q\n" + content
+        content_ref = add(stream(content))
+        kids.append(add(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                        f"/Resources {page_resources} /Contents {content_ref} 0 R >>"))
+    objects[0] = "<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + (body if isinstance(body, bytes) else body.encode()) + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def write_chequing_pdf(path, pages, rows_per_page, seed=0, year=2023, month=12):
+    """Write the chequing statement of write_chequing_xml as a PDF, the table in a Form XObject."""
+    rendered = []
+    for page, rows in enumerate(_chequing_statement(pages, rows_per_page, seed, year, month)):
+        form = []
+        for n, (cells, font) in enumerate(rows):
+            y = 760.0 - 12 * n
+            name = 'F2' if font == FONT_BOLD else 'F1'
+            for x, text in zip(CHEQUING_COLUMNS, cells):
+                if text:
+                    ops, end = _pdf_words(name, x + 2.0, y, text)
+                    form.append(ops)
+                    form.append(f"{end + SPACE_WIDTH:.2f} {y:.2f} m {end + SPACE_WIDTH:.2f} {y + 9:.2f} l S\n")
+            form.append(f"0 {y - 2:.2f} m 600 {y - 2:.2f} l S\n")
+        # A footer outside the form becomes the first text box, leaving the table as page[1]
+        footer, _ = _pdf_words('F1', 40.0, 30.0, f"{page + 1} of {pages}")
+        rendered.append((footer, ''.join(form)))
+    _write_pdf(path, rendered)
+
+
+def write_credit_pdf(path, pages, rows_per_page, seed=0, year=2023, month=12):
+    """Write the Visa statement of write_credit_xml as a PDF of plain text lines."""
+    rendered = []
+    for lines in _credit_statement(pages, rows_per_page, seed, year, month):
+        content = ''.join(f"BT /F1 9 Tf 40 {750 - 12 * n} Td ({_pdf_escape(line)}) Tj ET\n"
+                          for n, line in enumerate(lines))
+        rendered.append((content, None))
+    _write_pdf(path, rendered)
+
+
+WRITERS = {
+    ('visa', 'xml'): write_credit_xml,
+    ('visa', 'pdf'): write_credit_pdf,
+    ('chequing', 'xml'): write_chequing_xml,
+    ('chequing', 'pdf'): write_chequing_pdf,
+}
+
+
+def generate_corpus(directory, kind, fmt, files, pages, rows_per_page):
+    """
+    Write `files` synthetic statements of `kind` ('visa' or 'chequing') to `directory`, named
+    the way convert.py groups them by filename, one statement per month. Returns the paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    write = WRITERS[kind, fmt]
+    paths = []
+    for n in range(files):
+        year, month = 2015 + n // 12, n % 12 + 1
+        path = os.path.join(directory, f'{kind}-{year}-{month:02d}.{fmt}')
+        write(path, pages, rows_per_page, seed=n, year=year, month=month)
+        paths.append(path)
+    return paths
+
+
+def bench_memory(args):
+    import tracemalloc
+
+    with tempfile.TemporaryDirectory() as tmp:
+        credit_files = []
+        chequing_files = []
+        for n in range(args.statements):
+            year, month = 2015 + n // 12, n % 12 + 1
+            credit_files.append(os.path.join(tmp, f'visa-{n}.xml'))
+            write_credit_xml(credit_files[-1], args.pages, args.rows, seed=n, year=year, month=month)
+            chequing_files.append(os.path.join(tmp, f'chequing-{n}.xml'))
+            write_chequing_xml(chequing_files[-1], args.pages, args.rows, seed=n, year=year)
+
+        # Warm up imports and module-level caches so they are not counted as transaction memory
+        with contextlib.redirect_stdout(io.StringIO()):
+            convert._page_lines_impl()
+            convert._parse_credit_file(credit_files[0])
+            convert._parse_chequing_file(chequing_files[0])
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        with contextlib.redirect_stdout(io.StringIO()):
+            credit = []
+            for path in credit_files:
+                credit.extend(convert._parse_credit_file(path).transactions)
+            chequing = []
+            for path in chequing_files:
+                chequing.extend(convert._parse_chequing_file(path).transactions)
+        retained, peak = tracemalloc.get_traced_memory()
+        retained -= baseline
+
+        # The same transactions in the layout used before: dicts with datetimes, rows as lists
+        before = tracemalloc.get_traced_memory()[0]
+        legacy_credit = [
+            dict(txn._asdict(),
+                 transaction_date=datetime.combine(txn.transaction_date, datetime.min.time()),
+                 posting_date=datetime.combine(txn.posting_date, datetime.min.time()))
+            for txn in credit
+        ]
+        legacy_chequing = [list(row) for row in chequing]
+        legacy = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+    # Both layouts share the same strings, so only the per-record objects are compared
+    records = sum(sys.getsizeof(t) + sys.getsizeof(t.transaction_date) + sys.getsizeof(t.posting_date)
+                  for t in credit) + sum(sys.getsizeof(r) for r in chequing)
+    print(f"{args.statements} credit + {args.statements} chequing statements, "
+          f"{len(credit)} credit and {len(chequing)} chequing transactions")
+    print(f"  retained after parsing: {retained / 1e6:8.2f} MB")
+    print(f"  peak while parsing:     {peak / 1e6:8.2f} MB")
+    print(f"  record objects:         {records / 1e6:8.2f} MB "
+          f"(same transactions as dicts/datetimes/lists: {legacy / 1e6:.2f} MB)")
+    del legacy_credit, legacy_chequing
+
+
+def _legacy_chequing_date(text, open_balance_date, start_year):
+    # The per-cell code the chequing parser used before _chequing_date_resolver
+    from dateutil.parser import parse
+    date = parse(f"{text} {start_year}")
+    if date < open_balance_date:
+        date = parse(f"{text} {start_year+1}")
+    return str(date.date())
+
+
+def _legacy_credit_date(month, day, date_range):
+    # The per-date code the credit parser used before _credit_date_resolver
+    try:
+        return datetime.strptime(f'{month}-{day}-{date_range[month]}', '%b-%d-%Y').date()
+    except KeyError:
+        first_year = min([int(year) for year in date_range.values()]) if date_range else datetime.now().year
+        return datetime.strptime(f'{month}-{day}-{first_year}', '%b-%d-%Y').date()
+
+
+def _outcome(func, *args):
+    try:
+        return func(*args)
+    except ValueError:
+        return ValueError
+
+
+def _time_calls(func, calls, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for call in calls:
+            _outcome(func, *call)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_dates(args):
+    rng = random.Random(0)
+
+    # Chequing: "DD Mon" cells of a statement opening Dec 10, 2023 and running into 2024,
+    # plus a few other spellings that still go through dateutil.
+    open_balance_date = datetime(2023, 12, 10)
+    start_year = 2023
+    cells = []
+    for _ in range(args.tokens):
+        day = date(2023, 12, 10) + timedelta(days=rng.randint(0, 60))
+        cells.append(rng.choice([f"{day.day:02d} {day:%b}", f"{day:%b} {day.day}", f"{day.day} {day:%b}".upper()]))
+    cells += ["29 Feb", "31 Nov", "December 24", "Jan 3rd"]
+    resolve = convert._chequing_date_resolver(open_balance_date, start_year)
+    for cell in cells:
+        expected = _outcome(_legacy_chequing_date, cell, open_balance_date, start_year)
+        if _outcome(resolve, cell) != expected:
+            print(f"Chequing date mismatch for {cell!r}: {_outcome(resolve, cell)!r} != {expected!r}")
+            sys.exit(1)
+
+    # Credit: month/day tokens under a Dec -> Jan header, a header-less statement and a
+    # filename-inferred year map.
+    ranges = [
+        {'DEC': '2023', 'JAN': '2024'},
+        {},
+        {mon: str(2024 if n < 3 else 2023) for n, mon in enumerate(MONTHS)},
+    ]
+    tokens = [(rng.choice(MONTHS), f"{rng.randint(1, 28):02d}") for _ in range(args.tokens)]
+    tokens += [('FEB', '30'), ('APR', '31')]
+    for date_range in ranges:
+        resolve_credit = convert._credit_date_resolver(date_range)
+        for month, day in tokens:
+            expected = _outcome(_legacy_credit_date, month, day, date_range)
+            if _outcome(resolve_credit, month, day) != expected:
+                print(f"Credit date mismatch for {month} {day} with {date_range}")
+                sys.exit(1)
+    print(f"{len(cells)} chequing cells and {len(tokens)} x {len(ranges)} credit tokens: results identical")
+
+    repeat = args.repeat
+    legacy = _time_calls(_legacy_chequing_date, [(c, open_balance_date, start_year) for c in cells], repeat)
+    fresh = []
+    for _ in range(repeat):
+        resolve = convert._chequing_date_resolver(open_balance_date, start_year)
+        fresh.append(_time_calls(resolve, [(c,) for c in cells], 1))
+    print(f"  chequing  dateutil.parse {legacy:8.3f}s   resolver {min(fresh):8.3f}s   ({legacy / min(fresh):.0f}x)")
+
+    date_range = ranges[0]
+    legacy = _time_calls(_legacy_credit_date, [(m, d, date_range) for m, d in tokens], repeat)
+    fresh = []
+    for _ in range(repeat):
+        resolve_credit = convert._credit_date_resolver(date_range)
+        fresh.append(_time_calls(resolve_credit, tokens, 1))
+    print(f"  credit    strptime       {legacy:8.3f}s   resolver {min(fresh):8.3f}s   ({legacy / min(fresh):.0f}x)")
+
+
+def _legacy_credit_page_transactions(rows, resolve_date):
+    # The credit line parser used before the single-pass tokenizer (compiled per statement)
+    import re
+    txns = []
+    re_exchange_rate = re.compile(r'Exchange rate-([0-9]+\.[0-9]+)', re.MULTILINE)
+    re_foreign_currency = re.compile(r'Foreign Currency-([A-Z]+) ([0-9]+\.[0-9]+)', re.MULTILINE)
+    months = {'JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'}
+    mon_alt = '(?:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)'
+    re_txn_prefix = re.compile(rf'^(?P<m1>{mon_alt})\s?(?P<d1>\d{{2}})(?P<m2>{mon_alt})\s?(?P<d2>\d{{2}})')
+    txn_rows = []
+    for row in rows:
+        for line in row.splitlines():
+            s = line.strip()
+            if len(s) < 10:
+                continue
+            m = re_txn_prefix.match(s)
+            if m and m.group('m1') in months and m.group('m2') in months:
+                txn_rows.append(s)
+    for row in txn_rows:
+        m = re_txn_prefix.match(row)
+        if not m:
+            continue
+        transaction_date = resolve_date(m.group('m1'), m.group('d1'))
+        posting_date = resolve_date(m.group('m2'), m.group('d2'))
+        desc_and_amt = row[m.end():]
+        m_amt = re.search(r'(-?\$?\d{1,3}(?:,\d{3})*(?:\.\d{2}))', desc_and_amt)
+        if not m_amt:
+            continue
+        description = desc_and_amt[:m_amt.start()]
+        amount = m_amt.group(1)
+        if description.endswith('-'):
+            description = description[:-1]
+            if not amount.strip().startswith('-'):
+                amount = '-' + amount
+        description = description.split("\n")[0].strip()
+        raw = row.strip()
+        amount = amount.replace('$', '').replace(',', '').replace("\n", "")
+        match_exchange_rate = re_exchange_rate.search(raw)
+        match_foreign_currency = re_foreign_currency.search(raw)
+        if float(amount) > 0:
+            credit, debit = '', amount
+        else:
+            credit, debit = amount, ''
+        txns.append(convert.CreditTransaction(
+            transaction_date, posting_date, sys.intern(description), credit, debit, raw,
+            match_exchange_rate.group(1) if match_exchange_rate else None,
+            match_foreign_currency.group(1) if match_foreign_currency else None,
+            match_foreign_currency.group(2) if match_foreign_currency else None,
+        ))
+    return txns
+
+
+def _credit_lines(count, seed=0):
+    """Synthetic credit statement text lines: mostly transactions, with the awkward cases mixed in."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        mon, mon2 = rng.choice(MONTHS), rng.choice(MONTHS)
+        day, day2 = rng.randint(1, 28), rng.randint(1, 28)
+        sep = rng.choice(['', ' '])
+        prefix = f"{mon}{sep}{day:02d}{mon2}{sep}{day2:02d}"
+        amount = rng.randint(1, 900000) / 100
+        kind = rng.random()
+        if kind < 0.70:
+            line = f"{prefix} {rng.choice(MERCHANTS)} {rng.choice(['', '-'])}${amount:,.2f}"
+        elif kind < 0.78:
+            line = (f"{prefix} {rng.choice(MERCHANTS)} ${amount:,.2f} Foreign Currency-USD {amount / 1.35:.2f} "
+                    f"Exchange rate-1.{rng.randint(3000, 3999)}")
+        elif kind < 0.80:
+            # Exchange details before the amount, and a sign written after the description
+            line = f"{prefix} Exchange rate-1.3{rng.randint(0, 9)} {rng.choice(MERCHANTS)}--{amount:.2f}"
+        elif kind < 0.85:
+            line = f"{prefix} {rng.choice(MERCHANTS)} NO AMOUNT"
+        elif kind < 0.90:
+            line = rng.choice(["PREVIOUS STATEMENT BALANCE $1,234.56", "Page 2 of 3", "NEW BALANCE",
+                               f"{mon} {day:02d}", "TIME TO PAY $0.00"])
+        elif kind < 0.95:
+            line = f"  {prefix}{rng.choice(MERCHANTS)}{amount:.2f}  \n{rng.choice(MERCHANTS)} CONT'D"
+        else:
+            line = f"{prefix} {rng.choice(MERCHANTS)} ${rng.randint(1000, 9999999):,}.{rng.randint(0, 99):02d} 12.34"
+        lines.append(line)
+    return lines
+
+
+def bench_tokenizer(args):
+    resolve = convert._credit_date_resolver({'DEC': '2023', 'JAN': '2024'})
+    lines = _credit_lines(args.lines)
+    expected = _legacy_credit_page_transactions(lines, resolve)
+    got = convert._credit_page_transactions(lines, resolve)
+    if got != expected:
+        for line in lines:
+            old = _legacy_credit_page_transactions([line], resolve)
+            new = convert._credit_page_transactions([line], resolve)
+            if old != new:
+                print(f"Tokenizer differs on {line!r}:\n  before: {old}\n  after:  {new}")
+                break
+        sys.exit(1)
+    # Zero amounts, signs written before the amount, and impossible dates (which still raise)
+    edge_lines = ["JAN 01JAN 02 REFUND $0.00", "JAN 01JAN 02 REFUND -$0.00", "JAN 01JAN 02 FEE-$5.00",
+                  "JAN 01JAN 02 FEE--5.00", "JAN 01JAN 02 FEE - $1,000.00", "JAN 01JAN 02 $100.00 CR",
+                  "FEB 30FEB 30 SHELL $1.00", "APR 31APR 31 SHELL $1.00"]
+    for line in edge_lines:
+        if _outcome(_legacy_credit_page_transactions, [line], resolve) != _outcome(
+                convert._credit_page_transactions, [line], resolve):
+            print(f"Tokenizer differs on {line!r}")
+            sys.exit(1)
+    print(f"{len(lines)} lines, {len(got)} transactions: results identical")
+
+    for name, parse in (('before', _legacy_credit_page_transactions), ('tokenizer', convert._credit_page_transactions)):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            parse(lines, resolve)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"  {name:<10} {best:8.3f}s  {len(lines) / best / 1e3:8.0f}k lines/s")
+
+
+def bench_chequing_scaling(args):
+    page_counts = [int(n) for n in args.pages.split(',')]
+    print(f"{'pages':>6} {'blocks':>8} {'rows':>7} {'seconds':>8} {'ms/page':>8} {'us/block':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            path = os.path.join(tmp, f'chequing-{pages}.xml')
+            write_chequing_xml(path, pages, args.rows)
+            # The state machine rewrites date cells in place, so each run gets fresh blocks
+            encoded = convert._encode_blocks(convert._chequing_blocks(path))
+            best = None
+            for _ in range(args.repeat):
+                page_count, blocks = convert._decode_blocks(encoded)
+                start = time.perf_counter()
+                rows = list(convert._chequing_transactions(convert._blocks_by_page(page_count, blocks)))
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{pages:6d} {len(blocks):8d} {len(rows):7d} {best:8.3f} "
+                  f"{best / pages * 1000:8.3f} {best / len(blocks) * 1e6:9.2f}")
+
+
+STAGES = convert.profile_stages
+
+
+def _run_worker_config(kind, fmt, files, pages, rows_per_page):
+    """
+    Convert one synthetic corpus the way convert.py does (grouping, parse cache, lazy page
+    reading, dedup, sorting, one CSV per kind) with --profile's stage timings; prints them as
+    one JSON line.
+    """
+    import csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_corpus(tmp, kind, fmt, files, pages, rows_per_page)
+        if fmt == 'pdf':
+            import pdfminer.high_level  # noqa: F401
+        import dateutil.parser  # noqa: F401
+        convert._page_lines_impl()
+        baseline = _peak_rss_mb()
+
+        out_dir = os.path.join(tmp, 'out')
+        os.makedirs(out_dir)
+        cwd = os.getcwd()
+        os.chdir(out_dir)
+        try:
+            convert.enable_profiling()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                convert._convert_groups(convert._group_statements(paths), cache_dir=os.path.join(tmp, 'cache'))
+            elapsed = time.perf_counter() - start
+            transactions = 0
+            for name in os.listdir(out_dir):
+                with open(name, newline='') as f:
+                    transactions += sum(1 for _ in csv.reader(f)) - 1
+        finally:
+            os.chdir(cwd)
+
+    stats = convert._profile_stats.values()
+    totals = {name: sum(s['stages'].get(name, 0.0) for s in stats) for name in STAGES}
+    print(json.dumps({
+        'kind': kind, 'format': fmt, 'files': files, 'pages': pages, 'rows': rows_per_page,
+        'seconds': elapsed,
+        'stages': totals,
+        'pages_parsed': sum(s['counts'].get('pages', 0) for s in stats),
+        'transactions': transactions,
+        'files_per_sec': files / elapsed,
+        'transactions_per_sec': transactions / elapsed,
+        'baseline_rss_mb': baseline,
+        'peak_rss_mb': _peak_rss_mb(),
+    }))
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _config_key(result):
+    return (result['kind'], result['format'], result['files'], result['pages'], result['rows'])
+
+
+def bench_generate(args):
+    for kind in args.kind.split(','):
+        paths = generate_corpus(args.directory, kind, args.format, args.files, args.pages, args.rows)
+        print(f"Wrote {len(paths)} {kind} statement(s) to {args.directory}")
+
+
+def bench_run(args):
+    def sizes(value):
+        return [int(n) for n in value.split(',')]
+
+    results = []
+    print(f"{'kind':<9} {'fmt':<4} {'files':>5} {'pages':>5} {'rows':>5} {'files/s':>8} {'txns/s':>9} "
+          f"{'peak MB':>8}  " + ' '.join(f"{name:>8}" for name in STAGES))
+    for kind in args.kind.split(','):
+        for fmt in args.format.split(','):
+            for files in sizes(args.files):
+                for pages in sizes(args.pages):
+                    for rows in sizes(args.rows):
+                        runs = [_run_worker('_run-worker', kind, fmt, str(files), str(pages), str(rows))
+                                for _ in range(args.repeat)]
+                        best = min(runs, key=lambda r: r['seconds'])
+                        results.append(best)
+                        print(f"{kind:<9} {fmt:<4} {files:5d} {pages:5d} {rows:5d} {best['files_per_sec']:8.2f} "
+                              f"{best['transactions_per_sec']:9.0f} {_format_mb(best['peak_rss_mb'])}  "
+                              + ' '.join(f"{best['stages'][name]:8.3f}" for name in STAGES))
+
+    report = {
+        'revision': _git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def bench_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    before = {_config_key(r): r for r in baseline['results']}
+    print(f"{baseline.get('revision')} -> {candidate.get('revision')} (ratios > 1 are faster)")
+    print(f"{'kind':<9} {'fmt':<4} {'files':>5} {'pages':>5} {'rows':>5} {'txns/s':>8}  "
+          + ' '.join(f"{name:>8}" for name in STAGES))
+    for result in candidate['results']:
+        old = before.get(_config_key(result))
+        if old is None:
+            continue
+        speedup = result['transactions_per_sec'] / old['transactions_per_sec'] if old['transactions_per_sec'] else 0
+        stages = ' '.join(
+            f"{old['stages'][name] / result['stages'][name]:7.2f}x"
+            if result['stages'].get(name) and old['stages'].get(name) else f"{'n/a':>8}"
+            for name in STAGES
+        )
+        print(f"{result['kind']:<9} {result['format']:<4} {result['files']:5d} {result['pages']:5d} "
+              f"{result['rows']:5d} {speedup:7.2f}x  {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for convert.py")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('extract', help="compare XML and streaming PDF extraction")
+    p.add_argument('files', nargs='+', help="PDF statements")
+    p.add_argument('--repeat', type=int, default=3, help="runs per engine; the fastest is reported")
+    p.add_argument('--verify', action='store_true', help="check both engines yield identical records first")
+    p.set_defaults(func=bench_extract)
+
+    p = sub.add_parser('group', help="verify and time NumPy vs pure-Python credit line grouping")
+    p.add_argument('files', nargs='+', help="PDF or XML statements (the golden corpus)")
+    p.add_argument('--repeat', type=int, default=3, help="runs per implementation; the fastest is reported")
+    p.set_defaults(func=bench_group)
+
+    p = sub.add_parser('chequing-scaling', help="time the chequing row state machine at increasing page counts")
+    p.add_argument('--pages', default='50,100,250,500', help="comma-separated page counts")
+    p.add_argument('--rows', type=int, default=40, help="transaction rows per page")
+    p.add_argument('--repeat', type=int, default=3, help="runs per size; the fastest is reported")
+    p.set_defaults(func=bench_chequing_scaling)
+
+    p = sub.add_parser('memory', help="tracemalloc memory use of a synthetic multi-year batch")
+    p.add_argument('--statements', type=int, default=60, help="statements of each kind (one per month)")
+    p.add_argument('--pages', type=int, default=3, help="pages per statement")
+    p.add_argument('--rows', type=int, default=40, help="transaction rows per page")
+    p.set_defaults(func=bench_memory)
+
+    p = sub.add_parser('dates', help="verify and time the date resolvers against the previous code")
+    p.add_argument('--tokens', type=int, default=100000, help="synthetic date cells per statement type")
+    p.add_argument('--repeat', type=int, default=3, help="runs per implementation; the fastest is reported")
+    p.set_defaults(func=bench_dates)
+
+    p = sub.add_parser('tokenizer', help="verify and time the credit line tokenizer against the previous parser")
+    p.add_argument('--lines', type=int, default=100000, help="synthetic statement lines")
+    p.add_argument('--repeat', type=int, default=3, help="runs per implementation; the fastest is reported")
+    p.set_defaults(func=bench_tokenizer)
+
+    p = sub.add_parser('generate', help="write a synthetic statement corpus")
+    p.add_argument('directory', help="output directory (created if missing)")
+    p.add_argument('--kind', default='visa,chequing', help="comma-separated: visa, chequing")
+    p.add_argument('--format', choices=('xml', 'pdf'), default='pdf', help="statement file format")
+    p.add_argument('--files', type=int, default=12, help="statements of each kind (one per month)")
+    p.add_argument('--pages', type=int, default=3, help="pages per statement")
+    p.add_argument('--rows', type=int, default=40, help="transaction rows per page")
+    p.set_defaults(func=bench_generate)
+
+    p = sub.add_parser('run', help="time each conversion stage over synthetic corpora of increasing size")
+    p.add_argument('--kind', default='visa,chequing', help="comma-separated: visa, chequing")
+    p.add_argument('--format', default='xml', help="comma-separated: xml, pdf")
+    p.add_argument('--files', default='1,10', help="comma-separated statement counts")
+    p.add_argument('--pages', default='1,10', help="comma-separated pages per statement")
+    p.add_argument('--rows', default='40', help="comma-separated transaction rows per page")
+    p.add_argument('--repeat', type=int, default=1, help="runs per configuration; the fastest is reported")
+    p.add_argument('--output', default='bench-results.json', help="where to save the JSON results")
+    p.set_defaults(func=bench_run)
+
+    p = sub.add_parser('compare', help="compare two saved `run` results")
+    p.add_argument('baseline', help="JSON results of the reference run")
+    p.add_argument('candidate', help="JSON results to compare against it")
+    p.set_defaults(func=bench_compare)
+
+    p = sub.add_parser('_run-worker')
+    p.add_argument('kind', choices=('visa', 'chequing'))
+    p.add_argument('format', choices=('xml', 'pdf'))
+    p.add_argument('files', type=int)
+    p.add_argument('pages', type=int)
+    p.add_argument('rows', type=int)
+    p.set_defaults(func=lambda a: _run_worker_config(a.kind, a.format, a.files, a.pages, a.rows))
+
+    p = sub.add_parser('_extract-worker')
+    p.add_argument('engine', choices=sorted(EXTRACT_ENGINES))
+    p.add_argument('path')
+    p.set_defaults(func=lambda a: _extract_worker(a.engine, a.path))
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
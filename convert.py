@@ -1,57 +1,207 @@
 #!/usr/bin/env python3
-from datetime import datetime
-from dateutil.parser import parse
+from datetime import date, datetime
 import sys
-import xml.etree.ElementTree as ET
 import re
 import csv
 import os
 import glob
-from typing import List
+import bisect
+import collections
+import functools
+import itertools
+import operator
+import hashlib
+import heapq
+import io
+import json
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator, List, NamedTuple, Optional
 
-# Lazy import of pdfminer when needed (keeps startup fast and avoids hard crash if not installed yet)
-def _pdf_to_xml_root(pdf_path: str):
-    from io import StringIO
+def parse(timestr: str) -> datetime:
+    """dateutil.parser.parse, imported on first use: only chequing statements need it."""
+    from dateutil.parser import parse as dateutil_parse
+    return dateutil_parse(timestr)
+
+class Segment(NamedTuple):
+    """One text fragment (a character, in pdfminer output) with its page position."""
+    page: int
+    x: float
+    x2: float
+    y: float
+    size: float
+    font: Optional[str]
+    text: str
+
+class PageLayout(NamedTuple):
+    number: int
+    # Every text fragment on the page, in document order (what page.iter('text') yields in the XML)
+    chars: List[Segment]
+    # Children of the page's second element (the statement figure in chequing layouts);
+    # None marks a non-text element such as a rule or rectangle.
+    figure: List[Optional[Segment]]
+
+def _xml_segment(page_num: int, tag) -> Segment:
+    bbox = tag.attrib.get('bbox', '0,0,0,0').split(',')
+    return Segment(
+        page_num,
+        float(bbox[0]),
+        float(bbox[2]),
+        float(bbox[1]),
+        float(tag.attrib.get('size', '0')),
+        tag.attrib.get('font'),
+        tag.text or '',
+    )
+
+def _xml_page_layout(page_num: int, page) -> PageLayout:
+    """Adapt one pdfminer XML <page> element to the records the layout engine produces."""
+    seen = {}
+    figure = []
+    # A page with a single layout item has pdfminer's <layout> element second, not a figure
+    if len(page) > 1 and page[1].tag != 'layout':
+        for tag in page[1]:
+            if tag.tag != 'text':
+                figure.append(None)
+                continue
+            try:
+                seen[tag] = _xml_segment(page_num, tag)
+            except (ValueError, IndexError):
+                seen[tag] = None
+            figure.append(seen[tag])
+
+    chars = []
+    for tag in page.iter('text'):
+        seg = seen[tag] if tag in seen else None
+        if seg is None:
+            try:
+                seg = _xml_segment(page_num, tag)
+            except (ValueError, IndexError):
+                continue
+        chars.append(seg)
+    return PageLayout(page_num, chars, figure)
+
+def _iter_xml_pages(xml_path: str) -> Iterator[PageLayout]:
+    """
+    Stream page records from a pre-extracted pdfminer XML file with ET.iterparse.
+    Each <page> is adapted as soon as it is complete and then detached from the tree,
+    so memory stays bounded by one page regardless of document length.
+    """
+    import xml.etree.ElementTree as ET
+    with _open_input(xml_path) as f:
+        parents = []
+        page_depth = None
+        page_num = 0
+        for event, el in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if el.tag == 'page' and page_depth is None:
+                    page_depth = len(parents)
+                parents.append(el)
+                continue
+
+            parents.pop()
+            if el.tag == 'page' and page_depth == len(parents):
+                page_depth = None
+                yield _xml_page_layout(page_num, el)
+                page_num += 1
+                el.clear()
+                if parents:
+                    parents[-1].remove(el)
+
+def _pdf_pages(pdf_path: str, maxpages: int = 0, page_numbers=None) -> Iterator[PageLayout]:
+    """
+    Walk pdfminer's layout objects one page at a time, without rendering the document to XML.
+    Coordinates and sizes are rounded to 3 decimals, exactly as the XML converter writes them,
+    so both paths yield identical records. maxpages=0 reads every page. page_numbers (ascending
+    0-based numbers, e.g. a range) restricts the walk to those pages, which keep their numbers.
+    """
     try:
-        # Prefer high_level API with XML output
-        from pdfminer.high_level import extract_text_to_fp
-        from pdfminer.layout import LAParams
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LAParams, LTAnno, LTChar, LTContainer
     except Exception as e:
         raise RuntimeError(
             "pdfminer.six is required to parse PDFs. Install dependencies first (see requirements.txt)."
         ) from e
 
-    output = StringIO()
-    with open(pdf_path, 'rb') as f:
-        extract_text_to_fp(f, output, laparams=LAParams(), output_type='xml', codec=None)
-    xml_text = output.getvalue()
-    try:
-        return ET.fromstring(xml_text)
-    except ET.ParseError as e:
-        # Surface a more actionable error with filename context
-        raise RuntimeError(f"Failed to parse XML converted from PDF: {pdf_path}. Error: {e}") from e
+    def char_segment(page_num, item):
+        x0, y0, x1, _ = item.bbox
+        return Segment(page_num, round(x0, 3), round(x1, 3), round(y0, 3), round(item.size, 3),
+                       item.fontname, item.get_text())
+
+    def walk(page_num, container, chars, figure=None):
+        for item in container:
+            if isinstance(item, LTChar):
+                seg = char_segment(page_num, item)
+                chars.append(seg)
+            elif isinstance(item, LTAnno):
+                # Spaces/newlines inserted by layout analysis carry no position or size
+                seg = Segment(page_num, 0.0, 0.0, 0.0, 0.0, None, item.get_text())
+                chars.append(seg)
+            else:
+                seg = None
+                if isinstance(item, LTContainer):
+                    walk(page_num, item, chars)
+            if figure is not None:
+                figure.append(seg)
 
+    numbers = itertools.count() if page_numbers is None else iter(page_numbers)
+    with _open_input(pdf_path) as f:
+        ltpages = extract_pages(f, laparams=LAParams(), maxpages=maxpages, page_numbers=page_numbers)
+        for page_num, ltpage in zip(numbers, ltpages):
+            chars = []
+            figure = []
+            for i, item in enumerate(ltpage):
+                if isinstance(item, LTChar):
+                    chars.append(char_segment(page_num, item))
+                elif isinstance(item, LTContainer):
+                    walk(page_num, item, chars, figure if i == 1 else None)
+            yield PageLayout(page_num, chars, figure)
 
-def _get_xml_root(input_path: str):
+def _iter_pages(input_path: str, maxpages: int = 0) -> Iterator[PageLayout]:
     ext = os.path.splitext(input_path)[1].lower()
     if ext == '.xml':
-        return ET.parse(input_path).getroot()
+        pages = _iter_xml_pages(input_path)
+        return itertools.islice(pages, maxpages) if maxpages else pages
     if ext == '.pdf':
-        return _pdf_to_xml_root(input_path)
+        return _pdf_pages(input_path, maxpages)
     raise ValueError(f"Unsupported input type for '{input_path}'. Expected .pdf or .xml")
 
+def _has_chequing_header_font(page: PageLayout) -> bool:
+    """Chequing/savings statements use a bold face within the first few elements of the page figure."""
+    for tag in page.figure[:11]:
+        if tag is not None and (font := tag.font):
+            if font.endswith("MetaBoldLF-Roman") or font.endswith("Utopia-Bold"):
+                return True
+    return False
+
+re_probe_txn = re.compile(r'(?:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)\d{2}(?:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)\d{2}')
+
+def _classify_statement(input_file: str) -> str:
+    """
+    Classify a statement as 'visa', 'chequing', 'savings' or 'unknown' from its first page only.
+    Used for files whose name does not say what they are, so each file gets exactly one full parse.
+    """
+    page = next(iter(_iter_pages(input_file, maxpages=1)), None)
+    if page is None:
+        return 'unknown'
+
+    # Figure text carries no whitespace, so compare with all whitespace removed
+    compact = re.sub(r'\s+', '', ''.join(seg.text for seg in page.chars))
+    if 'STATEMENTFROM' in compact or re_probe_txn.search(compact):
+        return 'visa'
+    if _has_chequing_header_font(page) or 'Youropeningbalance' in compact:
+        return 'savings' if 'savings' in compact.lower() else 'chequing'
+    return 'unknown'
 
-def _write_csv_with_retry(output_file: str, write_callback):
+
+def _retry_while_locked(output_file: str, action):
     """
-    Open a CSV file for writing and execute write_callback(writer).
-    If the file is locked (e.g., open in Excel), prompt the user to close it and press Enter to retry.
+    Run action(); if the file is locked (e.g., open in Excel), prompt the user to close it and
+    press Enter to retry.
     """
     while True:
         try:
-            with open(output_file, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                write_callback(writer)
-            break
+            return action()
         except PermissionError:
             print(f"Cannot write to '{output_file}' because it's open in another program.")
             try:
@@ -60,15 +210,126 @@ def _write_csv_with_retry(output_file: str, write_callback):
                 print("Write cancelled by user.")
                 raise
 
+def _write_csv_with_retry(output_file: str, write_callback, mode: str = 'w'):
+    """
+    Open a CSV file for writing (or appending, with mode='a') and execute write_callback(writer),
+    retrying while the file is locked by another program.
+    """
+    def write():
+        with open(output_file, mode, newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            write_callback(writer)
+    with profile_stage('write'):
+        _retry_while_locked(output_file, write)
+
+# Typed output for --format parquet/arrow/jsonl. Tables keep the CSV column names and order;
+# each column is (name, kind, scale) with kind 'date', 'string' or 'decimal' (decimal128(18, scale)).
+# Empty CSV cells are nulls. Rows are converted and written output_batch_rows at a time.
+output_formats = ('csv', 'parquet', 'arrow', 'jsonl')
+output_batch_rows = 10000
+
+def _output_path(output_file: str, fmt: str) -> str:
+    """credit_transactions.csv -> credit_transactions.parquet etc."""
+    return output_file if fmt == 'csv' else os.path.splitext(output_file)[0] + '.' + fmt
+
+def _decimal(text: Optional[str]) -> Optional[Decimal]:
+    """'-1,234.56' / '$12.00' -> Decimal; '' and None -> None."""
+    if not text:
+        return None
+    try:
+        return Decimal(text.replace(',', '').replace('$', ''))
+    except InvalidOperation:
+        raise ValueError(f"Cannot convert amount {text!r} to a decimal") from None
+
+def _arrow_schema(columns: List[tuple]):
+    import pyarrow as pa
+    types = {'date': lambda scale: pa.date32(), 'string': lambda scale: pa.string(),
+             'decimal': lambda scale: pa.decimal128(18, scale)}
+    return pa.schema([pa.field(name, types[kind](scale)) for name, kind, scale in columns])
+
+def _arrow_array(pa, output_file: str, column: tuple, arrow_type, values: tuple):
+    try:
+        return pa.array(values, type=arrow_type)
+    except pa.ArrowInvalid:
+        name, kind, scale = column
+        if kind != 'decimal':
+            raise
+        value = next((v for v in values if v is not None and -v.as_tuple().exponent > scale), None)
+        if value is None:
+            raise
+        raise ValueError(f"Cannot write {name} value {value} to '{output_file}': it has more than "
+                         f"{scale} decimal places (CSV and JSON Lines output keep it as is)") from None
+
+def _json_value(kind: str, value) -> str:
+    if value is None:
+        return 'null'
+    if kind == 'decimal':
+        return str(value)  # exact JSON number
+    if kind == 'date':
+        return f'"{value.isoformat()}"'
+    return json.dumps(value, ensure_ascii=False)
+
+def _write_table(output_file: str, fmt: str, columns: List[tuple], rows: Iterable[tuple]):
+    """
+    Write typed rows (tuples in column order) to output_file as Parquet, an Arrow IPC file or
+    JSON Lines, retrying while the file is locked by another program. Parquet and Arrow need pyarrow.
+    """
+    def batches():
+        rows_iter = iter(rows)
+        while batch := list(itertools.islice(rows_iter, output_batch_rows)):
+            yield batch
+
+    if fmt == 'jsonl':
+        keys = [json.dumps(name) + ': ' for name, _, _ in columns]
+        kinds = [kind for _, kind, _ in columns]
+
+        def write(path: str):
+            with open(path, 'w', encoding='utf-8', newline='\n') as f:
+                for batch in batches():
+                    f.write(''.join(
+                        '{' + ', '.join(key + _json_value(kind, value) for key, kind, value in zip(keys, kinds, row)) + '}\n'
+                        for row in batch
+                    ))
+    else:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError(
+                f"pyarrow is required for --format {fmt}. Install it with 'pip install pyarrow'."
+            ) from e
+        schema = _arrow_schema(columns)
+
+        def write(path: str):
+            opener = pq.ParquetWriter if fmt == 'parquet' else pa.ipc.new_file
+            with opener(path, schema) as writer:
+                for batch in batches():
+                    arrays = [_arrow_array(pa, output_file, column, field.type, values)
+                              for values, column, field in zip(zip(*batch), columns, schema)]
+                    writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+    # Written under a temporary name and then moved over output_file, so a failure part way
+    # (e.g. an amount that does not convert) leaves no truncated file and keeps the previous one
+    tmp_path = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        with profile_stage('write'):
+            write(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _replace_with_retry(tmp_path, output_file)
+
 output_file_credit = 'credit_transactions.csv'
 output_file_chequing = 'chequing_transactions.csv'
 output_file_savings = 'savings_transactions.csv'
-input_files = sys.argv[1:]
 
 font_header = "MetaBookLF-Roman"
 font_txn = "MetaBoldLF-Roman"
 
 class Block:
+    __slots__ = ('page', 'x', 'x2', 'y', 'text')
+
     def __init__(self, page, x, x2, y, text):
         self.page = page
         self.x = x
@@ -79,432 +340,1832 @@ class Block:
     def __repr__(self):
         return f"<Block page={self.page} x={self.x} x2={self.x2} y={self.y} text={self.text} />"
 
-def process_credit_statements(input_files: List[str], output_file: str):
-    txns = []
-    re_exchange_rate = re.compile(r'Exchange rate-([0-9]+\.[0-9]+)', re.MULTILINE)
-    re_foreign_currency = re.compile(r'Foreign Currency-([A-Z]+) ([0-9]+\.[0-9]+)', re.MULTILINE)
+# Instrumentation for --profile. Code wraps its work in profile_stage(name) and reports sizes with
+# profile_count(name, n); both are attributed to the statement (or output CSV) being processed.
+# Stage times are exclusive: time spent in a nested stage is only counted there. With profiling
+# off (the default) both calls return after a single flag check.
+profile_stages = ('cache', 'extract', 'group', 'parse', 'write')
+profile_counters = ('pages', 'segments', 'blocks', 'transactions')
+
+_profile_enabled = False
+_profile_stats = {}   # target -> {'stages': {name: seconds}, 'counts': {name: n}}
+_profile_events = []  # Chrome trace "complete" events
+# Per thread (the pipeline's writer thread has its own): .target, the file being attributed,
+# and .stack, the [name, start, nested seconds] of the stages currently open
+_profile_local = threading.local()
+
+def _profile_thread():
+    local = _profile_local
+    if not hasattr(local, 'stack'):
+        local.target = None
+        local.stack = []
+    return local
+
+def enable_profiling(enabled: bool = True):
+    global _profile_enabled
+    _profile_enabled = enabled
+    _profile_stats.clear()
+    _profile_events.clear()
+
+def _profile_entry(target):
+    stats = _profile_stats.get(target)
+    if stats is None:
+        stats = _profile_stats[target] = {'stages': {}, 'counts': {}}
+    return stats
+
+class _ProfileTarget:
+    """Attribute the stages and counts recorded inside the block to target (a file name)."""
+    __slots__ = ('target', 'previous')
+
+    def __init__(self, target):
+        self.target = target
+
+    def __enter__(self):
+        local = _profile_thread()
+        self.previous = local.target
+        local.target = self.target
+        return self
+
+    def __exit__(self, *exc):
+        _profile_thread().target = self.previous
+        return False
+
+class _ProfileStage:
+    __slots__ = ('name', 'frame')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if _profile_enabled:
+            self.frame = [self.name, time.perf_counter(), 0.0]
+            _profile_thread().stack.append(self.frame)
+        return self
+
+    def __exit__(self, *exc):
+        if _profile_enabled:
+            end = time.perf_counter()
+            local = _profile_thread()
+            name, start, nested = local.stack.pop()
+            elapsed = end - start
+            if local.stack:
+                local.stack[-1][2] += elapsed
+            stages = _profile_entry(local.target)['stages']
+            stages[name] = stages.get(name, 0.0) + elapsed - nested
+            _profile_events.append({
+                'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                'ts': start * 1e6, 'dur': elapsed * 1e6, 'args': {'file': local.target},
+            })
+        return False
+
+def profile_stage(name: str) -> _ProfileStage:
+    """Context manager timing the enclosed block as stage `name` when profiling is enabled."""
+    return _ProfileStage(name)
+
+def profile_count(name: str, n: int = 1):
+    """Add n to counter `name` when profiling is enabled."""
+    if _profile_enabled:
+        counts = _profile_entry(_profile_thread().target)['counts']
+        counts[name] = counts.get(name, 0) + n
+
+def _profile_iter(name: str, iterable: Iterable) -> Iterator:
+    """Yield from iterable, timing each step as stage `name` (for lazy producers like page readers)."""
+    if not _profile_enabled:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with profile_stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def _profiled(func, input_file: str, enabled: bool):
+    """
+    Run func(input_file) with its stages attributed to input_file. Returns (result, stats, events)
+    so results from worker processes can be merged back with _merge_profile.
+    """
+    global _profile_enabled
+    if not enabled:
+        return func(input_file), None, None
+    _profile_enabled = True
+    stats_before = len(_profile_events)
+    with _ProfileTarget(input_file):
+        result = func(input_file)
+    return result, _profile_stats.get(input_file), _profile_events[stats_before:]
+
+def _merge_profile(input_file: str, stats: Optional[dict], events: Optional[list]):
+    if not stats or _profile_stats.get(input_file) is stats:
+        return  # nothing recorded, or recorded in this process already
+    entry = _profile_entry(input_file)
+    for kind in ('stages', 'counts'):
+        for name, value in stats[kind].items():
+            entry[kind][name] = entry[kind].get(name, 0) + value
+    _profile_events.extend(events)
+
+def print_profile(file=None):
+    """Print the per-file and total stage breakdown collected since enable_profiling()."""
+    if not _profile_stats:
+        return
+    names = [name for name in profile_stages if any(name in s['stages'] for s in _profile_stats.values())]
+    names += sorted({name for s in _profile_stats.values() for name in s['stages']} - set(names))
+    counters = [name for name in profile_counters if any(name in s['counts'] for s in _profile_stats.values())]
+    title = 'Profile (seconds)'
+    width = max(len(title), *(len(os.path.basename(str(t))) for t in _profile_stats))
+    print(f"\n{title:<{width}} " + ' '.join(f"{n:>9}" for n in names + ['total'])
+          + ''.join(f" {n:>12}" for n in counters), file=file)
+    total = {'stages': {}, 'counts': {}}
+    for target, stats in _profile_stats.items():
+        for kind in ('stages', 'counts'):
+            for name, value in stats[kind].items():
+                total[kind][name] = total[kind].get(name, 0) + value
+    for target, stats in list(_profile_stats.items()) + [('TOTAL', total)]:
+        times = [stats['stages'].get(name, 0.0) for name in names]
+        print(f"{os.path.basename(str(target)):<{width}} " + ' '.join(f"{t:9.3f}" for t in times)
+              + f" {sum(times):9.3f}" + ''.join(f" {stats['counts'].get(n, 0):12d}" for n in counters), file=file)
+
+def write_profile_trace(path: str):
+    """Write the recorded stages as Chrome trace JSON (chrome://tracing, Perfetto)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': _profile_events, 'displayTimeUnit': 'ms'}, f)
+
+# Bump whenever the extraction/grouping code changes so stale cache entries are ignored
+PARSER_VERSION = 1
+default_cache_dir = '.statement_cache'
+cache_max_bytes = 256 * 1024 * 1024
+
+# SHA-256 of each input by (path, size, mtime), so duplicate detection, the parse cache and the
+# export index hash a file at most once per process
+_file_digests = {}
+
+def _file_digest(input_path: str) -> str:
+    st = os.stat(input_path)
+    memo_key = (os.path.abspath(input_path), st.st_size, st.st_mtime_ns)
+    if memo_key not in _file_digests:
+        digest = hashlib.sha256()
+        with _open_input(input_path) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        _file_digests[memo_key] = digest.hexdigest()
+    return _file_digests[memo_key]
+
+def _evict_cache(cache_dir: str, max_bytes: int):
+    """Delete the least recently used cache entries until the cache fits in max_bytes."""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.json'):
+            continue
+        try:
+            st = os.stat(os.path.join(cache_dir, name))
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            pass
+        total -= size
 
+def _cached(cache_dir: Optional[str], kind: str, input_file: str, extract, encode=None, decode=None):
+    """
+    Return extract(input_file), reusing a previous result stored in cache_dir when the file
+    content (SHA-256) and PARSER_VERSION are unchanged. A hit refreshes the entry's mtime,
+    which is what LRU eviction orders by. With cache_dir=None the cache is bypassed.
+    """
+    if not cache_dir:
+        return extract(input_file)
+
+    key = f"{kind}-v{PARSER_VERSION}-{_file_digest(input_file)}"
+    path = os.path.join(cache_dir, key + '.json')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        os.utime(path)
+        return decode(data) if decode else data
+    except (OSError, ValueError):
+        pass
+
+    result = extract(input_file)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary name first so concurrent workers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(encode(result) if encode else result, f)
+        os.replace(tmp_path, path)
+        _evict_cache(cache_dir, cache_max_bytes)
+    except OSError as e:
+        print(f"Warning: could not write parse cache entry for '{input_file}': {e}")
+    return result
+
+# Pipelining: in a serial run the next prefetch_files statements are read into memory on
+# background threads while the current one is parsed, so slow reads (network shares) overlap
+# with parsing; readers go through _open_input to pick up the prefetched bytes. Results can be
+# handed to a writer thread, at most writer_queue_files ahead of it. Files over prefetch_max_bytes
+# are not read ahead but streamed from disk, keeping large XML at one page in memory, and a
+# single-file run reads nothing ahead since nothing would overlap.
+prefetch_files = 4
+prefetch_max_bytes = 8 * 1024 * 1024
+writer_queue_files = 4
+_prefetched = {}  # input file -> bytes, while the file is being parsed
+
+def _read_file(path: str) -> Optional[bytes]:
+    """The contents of path, or None if it is too large to prefetch."""
+    if os.path.getsize(path) > prefetch_max_bytes:
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _open_input(path: str):
+    """Open an input file for binary reading, from memory if it has been prefetched."""
+    data = _prefetched.get(path)
+    return io.BytesIO(data) if data is not None else open(path, 'rb')
+
+def _prefetching(func, input_files: List[str]) -> Iterator:
+    """Yield func(input_file) for each file in order, reading the following files ahead."""
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=prefetch_files, thread_name_prefix='prefetch') as readers:
+        reads = collections.deque()
+        upcoming = iter(input_files)
+        for input_file in itertools.islice(upcoming, prefetch_files):
+            reads.append(readers.submit(_read_file, input_file))
+        for input_file in input_files:
+            try:
+                data = reads.popleft().result()
+            except OSError:
+                data = None  # let the parser open the file and report the error itself
+            for next_file in itertools.islice(upcoming, 1):
+                reads.append(readers.submit(_read_file, next_file))
+            if data is not None:
+                _prefetched[input_file] = data
+            try:
+                result = func(input_file)
+            finally:
+                _prefetched.pop(input_file, None)
+            yield result
+
+def _map_files(func, input_files: List[str], jobs: int = 1, consume=None):
+    """
+    Apply func to every input file and return the results in input order.
+    With jobs > 1 the files are handed to a process pool; results are still collected
+    in the original order so downstream sorting and output match a serial run. Otherwise files
+    are read ahead while earlier ones are parsed (see prefetch_files).
+    If given, consume(input_file, result) is called for each result, in input order, on a
+    writer thread that runs while the following files are parsed.
+    """
+    run = functools.partial(_profiled, func, enabled=_profile_enabled)
+    if len(input_files) <= 1:
+        outputs = map(run, input_files)
+        executor = None
+    elif jobs <= 1:
+        outputs = _prefetching(run, input_files)
+        executor = None
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=min(jobs, len(input_files)))
+        outputs = executor.map(run, input_files)
+
+    results = []
+    writes = collections.deque()
+    writer = None
+    try:
+        if consume is not None:
+            from concurrent.futures import ThreadPoolExecutor
+            writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='writer')
+        for input_file, (result, stats, events) in zip(input_files, outputs):
+            _merge_profile(input_file, stats, events)
+            results.append(result)
+            if writer is not None:
+                # Wait for the writer to catch up rather than queue results without bound
+                while len(writes) >= writer_queue_files:
+                    writes.popleft().result()
+                writes.append(writer.submit(consume, input_file, result))
+        while writes:
+            writes.popleft().result()
+    finally:
+        if writer is not None:
+            writer.shutdown(wait=True)
+        if executor is not None:
+            executor.shutdown(wait=True)
+    return results
+
+# Incremental export: a JSON sidecar next to each CSV lists the statements already in it
+# (content hash, size/mtime for a quick unchanged check, account number, statement date range
+# and exported row count), so later runs only parse and write statements that are new.
+EXPORT_INDEX_VERSION = 1
+
+def _export_index_path(output_file: str) -> str:
+    return os.path.splitext(output_file)[0] + '.index.json'
+
+def _load_export_index(output_file: str) -> Optional[List[dict]]:
+    """Return the statements recorded for output_file, or None if there is no usable index."""
+    if not os.path.exists(output_file):
+        return None
+    try:
+        with open(_export_index_path(output_file), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != EXPORT_INDEX_VERSION:
+            return None
+        return data['statements']
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+def _save_export_index(output_file: str, statements: List[dict]):
+    path = _export_index_path(output_file)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': EXPORT_INDEX_VERSION, 'statements': statements}, f, indent=1)
+    os.replace(tmp_path, path)
+
+def _export_entry(input_file: str, account: Optional[str], first: Optional[str],
+                  last: Optional[str], rows: int) -> dict:
+    st = os.stat(input_file)
+    return {
+        'file': os.path.abspath(input_file),
+        'size': st.st_size,
+        'mtime': st.st_mtime,
+        'sha256': _file_digest(input_file),
+        'account': account,
+        'first': first,
+        'last': last,
+        'rows': rows,
+    }
+
+def _split_new_statements(input_files: List[str], statements: List[dict]):
+    """
+    Return (new_files, changed): the input files not yet exported, and whether any exported
+    file now has different content. Files whose size and mtime match their entry are not hashed.
+    """
+    by_path = {entry['file']: entry for entry in statements}
+    digests = {entry['sha256'] for entry in statements}
+    new_files = []
+    changed = False
     for input_file in input_files:
-        root = _get_xml_root(input_file)
-        rows = []
-
-        print(f'Processing {input_file}...')
-
-        # Build line-oriented rows robustly by grouping text fragments by Y position
-        # Do not assume a fixed child index (page[1]) as pdfminer XML can vary.
-        pages = [el for el in list(root) if getattr(el, 'tag', None) == 'page']
-        if not pages:
-            # Fallback: find any nested page elements
-            pages = list(root.findall('.//page'))
-
-        for page in pages:
-            # Collect candidate text segments with coordinates
-            segments = []
-            for tag in page.iter('text'):
-                try:
-                    size = float(tag.attrib.get('size', '0'))
-                    if not (5 <= size <= 12):
-                        continue
-                    bbox = tag.attrib.get('bbox', '0,0,0,0').split(',')
-                    x_pos = float(bbox[0])
-                    y_pos = float(bbox[1])
-                    x2_pos = float(bbox[2])
-                    txt = tag.text or ''
-                    if not txt:
-                        continue
-                except Exception:
-                    continue
-                segments.append((y_pos, x_pos, x2_pos, txt))
-
-            if not segments:
+        path = os.path.abspath(input_file)
+        st = os.stat(input_file)
+        entry = by_path.get(path)
+        if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime:
+            continue
+        digest = _file_digest(input_file)
+        if digest in digests:
+            if entry and entry['sha256'] == digest:
+                # Touched but unchanged; remember the new mtime to skip hashing next time
+                entry['mtime'] = st.st_mtime
+            continue
+        if entry:
+            changed = True
+        new_files.append(input_file)
+    return new_files, changed
+
+# Duplicate statements: an input with the same bytes as an earlier one (the same statement saved
+# under two names) is skipped; its digest is taken in the parse step from the bytes read ahead.
+# Overlapping statements of one account, or one statement given both as a PDF and as its exported
+# XML, repeat the transactions of the days both cover; those are merged per output file by an
+# index of transaction keys kept per account. Undated rows, and statements whose account number
+# is not found on the first page, are never merged.
+re_card_number = re.compile(r'\b\d{4} ?\d{2}\*\* ?\*{4} ?(\d{4})\b')
+re_account_number = re.compile(r'account ?number:? ?[\d-]*(\d{4})\b', re.IGNORECASE)
+
+class _ParsedStatement(NamedTuple):
+    digest: str
+    account: Optional[str]
+    transactions: Optional[list]  # None when skipped as a copy of an earlier input
+
+def _statement_account(lines: Iterable[str]) -> Optional[str]:
+    """The last four digits of the first card or account number in lines, or None."""
+    for line in lines:
+        match = re_card_number.search(line) or re_account_number.search(line)
+        if match:
+            return match.group(1)
+    return None
+
+def _tap_first_page(pages: Iterable[list], first_page: list) -> Iterator[list]:
+    """Yield pages unchanged, copying the items of the first one into first_page."""
+    for number, page in enumerate(pages):
+        if number == 0:
+            first_page.extend(page)
+        yield page
+
+def _is_copy(input_file: str, digest: str, digests: Optional[dict]) -> bool:
+    """Record digest in digests (digest -> first input file); True if it was already there."""
+    if digests is None:
+        return False
+    if digest in digests:
+        print(f"Skipping {input_file}: same contents as {digests[digest]}")
+        return True
+    digests[digest] = input_file
+    return False
+
+class _TransactionIndex:
+    """
+    Drop what one output file already has from each statement, fed to add() in input order:
+    inputs with the same bytes as an earlier one, and transactions an earlier statement of the
+    same account already had. A key occurring n times in one statement is kept until n copies
+    have been kept overall (the most any single statement had), so genuine same-day duplicates
+    within a statement survive. Keys include the date, so only days both statements cover can
+    match. If given, seed(account, first, last) returns the key counts already exported for an
+    account between two ISO dates.
+    """
+
+    def __init__(self, key, date_of, seed=None):
+        self.key = key
+        self.date_of = date_of
+        self.seed = seed
+        self.digests = {}
+        self.seen = {}  # account -> collections.Counter of transaction keys
+        self.parsed = 0
+        self.kept = 0
+
+    def add(self, input_file: str, statement: _ParsedStatement) -> Optional[list]:
+        """Return the statement's transactions that are new, or None if the input is a copy."""
+        if statement.transactions is None or _is_copy(input_file, statement.digest, self.digests):
+            return None
+        txns = statement.transactions
+        self.parsed += len(txns)
+        if statement.account is not None:
+            txns = self._merge(statement.account, txns)
+        self.kept += len(txns)
+        return txns
+
+    def _merge(self, account: str, txns: list) -> list:
+        seen = self.seen.setdefault(account, collections.Counter())
+        dates = [d for d in map(self.date_of, txns) if d is not None]
+        if self.seed is not None and dates:
+            seen |= self.seed(account, min(dates).isoformat(), max(dates).isoformat())
+        counts = collections.Counter()
+        kept = []
+        for txn in txns:
+            if self.date_of(txn) is None:
+                kept.append(txn)
                 continue
+            txn_key = self.key(txn)
+            counts[txn_key] += 1
+            if counts[txn_key] > seen[txn_key]:
+                kept.append(txn)
+        seen |= counts
+        return kept
 
-            # Sort by Y descending (top to bottom), then X ascending (left to right)
-            segments.sort(key=lambda s: (-s[0], s[1]))
+    def report(self, output_file: str):
+        if self.parsed > self.kept:
+            print(f"Skipped {self.parsed - self.kept} transactions for '{output_file}' already read from another statement.")
 
-            # Group into lines by Y with a small tolerance
-            y_tol = 0.9
-            line_items = []  # list of list of segments for each line
-            current_y = None
-            current_line = []
-            for y_pos, x_pos, x2_pos, txt in segments:
-                if current_y is None or abs(y_pos - current_y) > y_tol:
-                    if current_line:
-                        line_items.append(current_line)
-                    current_line = []
-                    current_y = y_pos
-                current_line.append((x_pos, x2_pos, txt))
+def _exported_keys(output_file: str, exported: List[dict], key_from_row, account: str,
+                   first: str, last: str) -> collections.Counter:
+    """
+    Count the keys of the rows of output_file dated first..last (ISO dates) that an account's
+    statements exported. The CSV does not say which statement a row came from, so it is only read
+    when the index lists a statement of the account overlapping the range, and nothing is counted
+    if a statement of another (or an unrecorded) account overlaps it too.
+    """
+    overlapping = [entry for entry in exported
+                   if entry['first'] and entry['first'] <= last and entry['last'] >= first]
+    if not overlapping or any(entry.get('account') != account for entry in overlapping):
+        return collections.Counter()
+    with open(output_file, newline='') as existing:
+        reader = csv.reader(existing)
+        next(reader, None)
+        return collections.Counter(key_from_row(row) for row in reader if row and first <= row[0] <= last)
+
+def _replace_with_retry(tmp_path: str, output_file: str):
+    with profile_stage('write'):
+        _retry_while_locked(output_file, lambda: os.replace(tmp_path, output_file))
+
+class _CsvStream:
+    """
+    Write a CSV as results arrive (e.g. as _map_files' consume callback) into a temporary file;
+    commit() then moves it over output_file, so a failed run leaves the previous output intact.
+    """
+
+    def __init__(self, output_file: str, header: List[str], to_row):
+        self.output_file = output_file
+        self.tmp_path = f"{output_file}.{os.getpid()}.tmp"
+        self.to_row = to_row
+        self.file = open(self.tmp_path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+
+    def write(self, input_file: str, rows: Iterable):
+        with _ProfileTarget(self.output_file), profile_stage('write'):
+            self.writer.writerows(map(self.to_row, rows))
+
+    def commit(self):
+        self.file.close()
+        _replace_with_retry(self.tmp_path, self.output_file)
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+# Fragments whose baselines are within line_y_tol of a line's first fragment belong to that line;
+# a horizontal gap wider than word_gap between fragments becomes a space.
+line_y_tol = 0.9
+word_gap = 0.7
+
+def _page_lines_python(chars: List[Segment]) -> List[str]:
+    """Group a page's text fragments into lines, top to bottom, each stitched left to right."""
+    # Collect candidate text segments with coordinates
+    segments = []
+    for seg in chars:
+        if not (5 <= seg.size <= 12):
+            continue
+        if not seg.text:
+            continue
+        segments.append((seg.y, seg.x, seg.x2, seg.text))
+
+    if not segments:
+        return []
+
+    # Sort by Y descending (top to bottom), then X ascending (left to right)
+    segments.sort(key=lambda s: (-s[0], s[1]))
+
+    # Group into lines by Y with a small tolerance
+    line_items = []  # list of list of segments for each line
+    current_y = None
+    current_line = []
+    for y_pos, x_pos, x2_pos, txt in segments:
+        if current_y is None or abs(y_pos - current_y) > line_y_tol:
             if current_line:
                 line_items.append(current_line)
+            current_line = []
+            current_y = y_pos
+        current_line.append((x_pos, x2_pos, txt))
+    if current_line:
+        line_items.append(current_line)
 
-            # For each grouped line, stitch text by X order, adding spaces on noticeable gaps
-            for items in line_items:
-                items.sort(key=lambda s: s[0])
-                line_text = ''
-                prev_x2 = None
-                for x_pos, x2_pos, txt in items:
-                    if prev_x2 is not None and (x_pos - prev_x2) > 0.7 and len(line_text) > 10:
-                        line_text += ' '
-                    line_text += txt
-                    prev_x2 = x2_pos
-                if line_text:
-                    rows.append(line_text)
-
-        date_range_regex = re.compile(r'^.*STATEMENT FROM ([A-Z]{3}) \d{2},? ?(\d{4})? TO ([A-Z]{3}) \d{2}, (\d{4})', re.MULTILINE)
-        date_range = {}
-
-        for row in rows:
-            if match := date_range_regex.search(row):
-                date_range[match.group(1)] = match.group(2) or match.group(4)
-                date_range[match.group(3)] = match.group(4)
-                break
-
-        # If the statement header wasn't found (format change), infer year mapping from filename
-        if not date_range:
-            # Expect pattern like ...YYYY-MM-DD.pdf
-            m = re.search(r'(\d{4})-(\d{2})-(\d{2})', os.path.basename(input_file))
-            if m:
-                end_year = int(m.group(1))
-                end_month = int(m.group(2))
-                months = ['JAN','FEB','MAR','APR','MAY','JUN','JUL','AUG','SEP','OCT','NOV','DEC']
-                for idx, mon in enumerate(months, start=1):
-                    year_for_mon = end_year if idx <= end_month else end_year - 1
-                    date_range[mon] = str(year_for_mon)
-
-        MONTHS = {
-            'JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
-            'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'
-        }
-        # Robust matcher for two date tokens at the beginning (optional spaces between month/day)
-        mon_alt = '(?:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)'
-        re_txn_prefix = re.compile(rf'^(?P<m1>{mon_alt})\s?(?P<d1>\d{{2}})(?P<m2>{mon_alt})\s?(?P<d2>\d{{2}})')
-        txn_rows = []
-
-        for row in rows:
-            # Some rows may contain multiple lines; check line by line
-            for line in row.splitlines():
-                s = line.strip()
-                if len(s) < 10:
-                    continue
-                m = re_txn_prefix.match(s)
-                if m and m.group('m1') in MONTHS and m.group('m2') in MONTHS:
-                    txn_rows.append(s)
-
-        for row in txn_rows:
-            m = re_txn_prefix.match(row)
-            if not m:
-                continue
-            date_1_month = m.group('m1')
-            date_1_day = m.group('d1')
-            date_2_month = m.group('m2')
-            date_2_day = m.group('d2')
+    # For each grouped line, stitch text by X order, adding spaces on noticeable gaps
+    lines = []
+    for items in line_items:
+        items.sort(key=lambda s: s[0])
+        line_text = ''
+        prev_x2 = None
+        for x_pos, x2_pos, txt in items:
+            if prev_x2 is not None and (x_pos - prev_x2) > word_gap and len(line_text) > 10:
+                line_text += ' '
+            line_text += txt
+            prev_x2 = x2_pos
+        if line_text:
+            lines.append(line_text)
+    return lines
 
-            transaction_date = None
-            try:
-                transaction_date = datetime.strptime(f'{date_1_month}-{date_1_day}-{date_range[date_1_month]}', '%b-%d-%Y')
-            except KeyError:
-                first_year = min([int(year) for year in date_range.values()]) if date_range else datetime.now().year
-                transaction_date = datetime.strptime(f'{date_1_month}-{date_1_day}-{first_year}', '%b-%d-%Y')
-            try:
-                posting_date = datetime.strptime(f'{date_2_month}-{date_2_day}-{date_range[date_2_month]}', '%b-%d-%Y')
-            except KeyError:
-                first_year = min([int(year) for year in date_range.values()]) if date_range else datetime.now().year
-                posting_date = datetime.strptime(f'{date_2_month}-{date_2_day}-{first_year}', '%b-%d-%Y')
-
-            # Description starts after the matched date tokens
-            desc_and_amt = row[m.end():]
-            # Extract the first monetary token (with optional $ and sign) to avoid trailing summary text
-            m_amt = re.search(r'(-?\$?\d{1,3}(?:,\d{3})*(?:\.\d{2}))', desc_and_amt)
-            if not m_amt:
-                # If parsing fails, skip this line
+def _page_lines_numpy(chars: List[Segment]) -> List[str]:
+    """
+    Same result as _page_lines_python, computed on a NumPy segment table (y, x, x2, size,
+    text length and text index columns): the size filter, both sorts, line breaks, space
+    decisions and line offsets are array operations, and every line is joined exactly once.
+    """
+    import numpy as np
+
+    total = len(chars)
+    if not total:
+        return []
+
+    def column(field, dtype=np.float64, func=None):
+        values = map(operator.itemgetter(Segment._fields.index(field)), chars)
+        return np.fromiter(map(func, values) if func else values, dtype, total)
+
+    size = column('size')
+    length = column('text', np.int64, len)
+    index = np.flatnonzero((size >= 5) & (size <= 12) & (length > 0))
+    count = len(index)
+    if not count:
+        return []
+    y = column('y')[index]
+    x = column('x')[index]
+    x2 = column('x2')[index]
+    length = length[index]
+
+    # Y descending, then X ascending; lexsort is stable, like list.sort
+    order = np.lexsort((x, -y))
+    neg_y = -y[order]
+
+    # A line runs until a fragment sits more than line_y_tol below the line's *first* fragment.
+    # Breaking wherever consecutive fragments are more than line_y_tol apart gives the same lines
+    # as long as no resulting line spans more than line_y_tol; otherwise walk the line starts.
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(neg_y) > line_y_tol) + 1))
+    ends = np.append(starts[1:], count)
+    if (neg_y[ends - 1] - neg_y[starts] > line_y_tol).any():
+        candidate_ends = np.searchsorted(neg_y, neg_y + line_y_tol, side='right').tolist()
+        neg_y = neg_y.tolist()
+        walked = []
+        i = 0
+        while i < count:
+            walked.append(i)
+            j = max(candidate_ends[i], i + 1)
+            while j > i + 1 and neg_y[j - 1] - neg_y[i] > line_y_tol:
+                j -= 1
+            while j < count and not (neg_y[j] - neg_y[i] > line_y_tol):
+                j += 1
+            i = j
+        starts = np.array(walked)
+        ends = np.append(starts[1:], count)
+    line_sizes = ends - starts
+
+    # Within each line, order by X (stable with respect to the Y order above)
+    line_id = np.repeat(np.arange(len(starts)), line_sizes)
+    order = order[np.lexsort((x[order], line_id))]
+    x = x[order]
+    x2 = x2[order]
+    length = length[order]
+
+    # A gap becomes a space only once the line holds more than 10 characters. Spaces are only
+    # ever added after that point, so counting fragment text alone gives the same decision.
+    space = np.zeros(count, dtype=bool)
+    space[1:] = (x[1:] - x2[:-1]) > word_gap
+    space[starts] = False
+    lengths_before = np.cumsum(length) - length
+    lengths_before -= np.repeat(lengths_before[starts], line_sizes)
+    space &= lengths_before > 10
+
+    texts = [chars[k].text for k in index[order].tolist()]
+    for k in np.flatnonzero(space).tolist():
+        texts[k] = ' ' + texts[k]
+    bounds = starts.tolist() + [count]
+    return [''.join(texts[start:end]) for start, end in zip(bounds, bounds[1:])]
+
+@functools.lru_cache(maxsize=None)
+def _page_lines_impl():
+    # NumPy is optional; without it line grouping runs in pure Python
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return _page_lines_python
+    return _page_lines_numpy
+
+def _credit_page_rows(input_file: str) -> Iterator[List[str]]:
+    """Yield the text lines of a credit card statement one page at a time, top to bottom."""
+    with profile_stage('group'):
+        page_lines = _page_lines_impl()
+    for page in _profile_iter('extract', _iter_pages(input_file)):
+        profile_count('pages')
+        profile_count('segments', len(page.chars))
+        with profile_stage('group'):
+            rows = page_lines(page.chars)
+        yield rows
+
+def _credit_rows(input_file: str) -> List[str]:
+    """Extract the text lines of a credit card statement, top to bottom on each page."""
+    return [row for rows in _credit_page_rows(input_file) for row in rows]
+
+month_numbers = {
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
+    'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12,
+}
+
+def _credit_date_resolver(date_range: dict):
+    """
+    Build resolve(month, day) -> date for one credit statement, where month is an upper-case
+    abbreviation ('DEC') and day a zero-padded string ('05'). date_range maps the months named
+    in the STATEMENT FROM header (or inferred from the filename) to their year; any other
+    month falls back to the earliest of those years, or the current year without a header.
+    The per-month years are worked out once and repeated tokens come from a cache.
+    """
+    first_year = min(int(year) for year in date_range.values()) if date_range else datetime.now().year
+    years = {mon: int(date_range[mon]) if mon in date_range else first_year for mon in month_numbers}
+    cache = {}
+
+    def resolve(month: str, day: str) -> date:
+        key = (month, day)
+        if key not in cache:
+            cache[key] = date(years[month], month_numbers[month], int(day))
+        return cache[key]
+    return resolve
+
+class CreditTransaction(NamedTuple):
+    transaction_date: date
+    posting_date: date
+    description: str
+    credit: str
+    debit: str
+    raw: str
+    exchange_rate: Optional[str]
+    foreign_currency: Optional[str]
+    amount_foreign: Optional[str]
+
+# Credit statement lines. A transaction line is tokenized by one match of re_credit_txn: two
+# "MON DD" dates (optional space), the description, and the first amount after it. Foreign
+# exchange details are rare, so their pattern only runs on lines that mention them.
+re_credit_statement_range = re.compile(r'^.*STATEMENT FROM ([A-Z]{3}) \d{2},? ?(\d{4})? TO ([A-Z]{3}) \d{2}, (\d{4})', re.MULTILINE)
+re_credit_filename_date = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+_mon_alt = '(?:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)'
+re_credit_txn = re.compile(
+    rf'(?P<m1>{_mon_alt})\s?(?P<d1>\d{{2}})(?P<m2>{_mon_alt})\s?(?P<d2>\d{{2}})'
+    r'(?P<description>.*?)(?P<amount>-?\$?\d{1,3}(?:,\d{3})*(?:\.\d{2}))'
+)
+re_credit_fx = re.compile(r'Exchange rate-(?P<rate>[0-9]+\.[0-9]+)|Foreign Currency-(?P<currency>[A-Z]+) (?P<amount>[0-9]+\.[0-9]+)')
+
+def _credit_page_transactions(rows: List[str], resolve_date) -> List[CreditTransaction]:
+    """Tokenize the transaction lines among one page's text lines (see re_credit_txn)."""
+    txns = []
+    match_txn = re_credit_txn.match
+    intern = sys.intern
+    for row in rows:
+        # Some rows may contain multiple lines; check line by line
+        for line in row.splitlines():
+            raw = line.strip()
+            if len(raw) < 10:
                 continue
-            description = desc_and_amt[:m_amt.start()]
-            amount = m_amt.group(1)
+            m = match_txn(raw)
+            if not m:
+                continue
+            month_1, day_1, month_2, day_2, description, amount = m.groups()
+            transaction_date = resolve_date(month_1, day_1)
+            posting_date = resolve_date(month_2, day_2)
 
             # Normalize description and negative sign conventions
             if description.endswith('-'):
                 description = description[:-1]
-                if not amount.strip().startswith('-'):
+                if not amount.startswith('-'):
                     amount = '-' + amount
+            description = description.strip()
+            if '$' in amount:
+                amount = amount.replace('$', '')
+            if ',' in amount:
+                amount = amount.replace(',', '')
+
+            exchange_rate = foreign_currency = amount_foreign = None
+            if 'Exchange rate-' in raw or 'Foreign Currency-' in raw:
+                for fx in re_credit_fx.finditer(raw):
+                    if fx.group('rate') is not None:
+                        if exchange_rate is None:
+                            exchange_rate = fx.group('rate')
+                    elif foreign_currency is None:
+                        foreign_currency, amount_foreign = fx.group('currency', 'amount')
 
-            description = description.split("\n")[0].strip()
-            raw = row.strip()
-
-            amount = amount.replace('$', '').replace(',', '').replace("\n", "")
-            match_exchange_rate = re_exchange_rate.search(raw)
-            match_foreign_currency = re_foreign_currency.search(raw)
-            
-            if float(amount) > 0:
-                txns.append({
-                    'transaction_date': transaction_date,
-                    'posting_date': posting_date,
-                    'description': description,
-                    'credit': '',
-                    'debit': amount,
-                    'raw': raw,
-                    'exchange_rate': match_exchange_rate.group(1) if match_exchange_rate else None,
-                    'foreign_currency': match_foreign_currency.group(1) if match_foreign_currency else None,
-                    'amount_foreign': match_foreign_currency.group(2) if match_foreign_currency else None,
-                })
+            # amount is now -?D+.DD: positive unless signed or all zeros
+            if amount[0] != '-' and amount.strip('0.'):
+                credit, debit = '', amount
             else:
-                txns.append({
-                    'transaction_date': transaction_date,
-                    'posting_date': posting_date,
-                    'description': description,
-                    'credit': amount,
-                    'debit': '',
-                    'raw': raw,
-                    'exchange_rate': match_exchange_rate.group(1) if match_exchange_rate else None,
-                    'foreign_currency': match_foreign_currency.group(1) if match_foreign_currency else None,
-                    'amount_foreign': match_foreign_currency.group(2) if match_foreign_currency else None,
-                })
-
-    txns = sorted(txns, key = lambda txn: txn['transaction_date'])
+                credit, debit = amount, ''
+            txns.append(CreditTransaction(
+                transaction_date,
+                posting_date,
+                intern(description),
+                credit,
+                debit,
+                raw,
+                exchange_rate,
+                foreign_currency,
+                amount_foreign,
+            ))
+    return txns
+
+def _credit_transactions(input_file: str, pages: Iterable[List[str]]) -> Iterator[CreditTransaction]:
+    """
+    Parse the text lines of one credit card statement, given page by page, into transactions.
+    Lines are only held back until the STATEMENT FROM header (normally on the first page) fixes
+    the statement's years; after that each page's transactions are yielded as the page is read.
+    """
+    def parse_page(rows: List[str], resolve_date) -> List[CreditTransaction]:
+        with profile_stage('parse'):
+            txns = _credit_page_transactions(rows, resolve_date)
+        profile_count('transactions', len(txns))
+        return txns
+
+    date_range = {}
+    resolve_date = None
+    pending = []
+    for rows in pages:
+        if resolve_date is None:
+            pending.extend(rows)
+            for row in rows:
+                if 'STATEMENT FROM' in row and (match := re_credit_statement_range.search(row)):
+                    date_range[match.group(1)] = match.group(2) or match.group(4)
+                    date_range[match.group(3)] = match.group(4)
+                    break
+            if not date_range:
+                continue
+            resolve_date = _credit_date_resolver(date_range)
+            rows = pending
+        yield from parse_page(rows, resolve_date)
+
+    if resolve_date is not None:
+        return
+
+    # If the statement header wasn't found (format change), infer year mapping from filename
+    # Expect pattern like ...YYYY-MM-DD.pdf
+    m = re_credit_filename_date.search(os.path.basename(input_file))
+    if m:
+        end_year = int(m.group(1))
+        end_month = int(m.group(2))
+        months = ['JAN','FEB','MAR','APR','MAY','JUN','JUL','AUG','SEP','OCT','NOV','DEC']
+        for idx, mon in enumerate(months, start=1):
+            year_for_mon = end_year if idx <= end_month else end_year - 1
+            date_range[mon] = str(year_for_mon)
+    yield from parse_page(pending, _credit_date_resolver(date_range))
+
+def iter_credit_transactions(path: str, cache_dir: Optional[str] = None) -> Iterator[CreditTransaction]:
+    """
+    Yield the transactions of one Visa statement (PDF, or pdfminer XML) in statement order.
+    Pages are read lazily as the iterator is consumed. With cache_dir, the statement's text lines
+    are read from (or stored in) the parse cache used by the command line tool instead.
+    """
+    yield from _credit_transactions(path, _credit_pages(path, cache_dir))
+
+def _credit_pages(path: str, cache_dir: Optional[str] = None) -> Iterable[List[str]]:
+    if cache_dir:
+        with profile_stage('cache'):
+            rows = _cached(cache_dir, 'credit', path, _credit_rows)
+        return [rows]
+    return _credit_page_rows(path)
+
+def _parse_credit_file(input_file: str, cache_dir: Optional[str] = None,
+                       digests: Optional[dict] = None) -> _ParsedStatement:
+    """
+    Parse one statement for process_credit_statements; with digests (see _is_copy), an input
+    with the same contents as an earlier one is skipped without being parsed.
+    """
+    digest = _file_digest(input_file)
+    if _is_copy(input_file, digest, digests):
+        return _ParsedStatement(digest, None, None)
+    print(f'Processing {input_file}...')
+    first_page = []
+    pages = _tap_first_page(_credit_pages(input_file, cache_dir), first_page)
+    txns = list(_credit_transactions(input_file, pages))
+    return _ParsedStatement(digest, _statement_account(first_page), txns)
+
+credit_csv_header = [
+    'Transaction Date',
+    'Posting Date',
+    'Description',
+    'Credit',
+    'Debit',
+    'Amount Foreign Currency',
+    'Foreign Currency',
+    'Exchange Rate',
+    'Raw',
+]
+
+def _credit_csv_row(txn: CreditTransaction) -> list:
+    return [
+        txn.transaction_date.strftime('%Y-%m-%d'),
+        txn.posting_date.strftime('%Y-%m-%d'),
+        txn.description,
+        txn.credit,
+        txn.debit,
+        txn.amount_foreign,
+        txn.foreign_currency,
+        txn.exchange_rate,
+        txn.raw,
+    ]
+
+credit_columns = [
+    ('Transaction Date', 'date', None),
+    ('Posting Date', 'date', None),
+    ('Description', 'string', None),
+    ('Credit', 'decimal', 2),
+    ('Debit', 'decimal', 2),
+    ('Amount Foreign Currency', 'decimal', 4),
+    ('Foreign Currency', 'string', None),
+    ('Exchange Rate', 'decimal', 10),
+    ('Raw', 'string', None),
+]
+
+def _credit_typed_row(txn: CreditTransaction) -> tuple:
+    return (
+        txn.transaction_date,
+        txn.posting_date,
+        txn.description,
+        _decimal(txn.credit),
+        _decimal(txn.debit),
+        _decimal(txn.amount_foreign),
+        txn.foreign_currency,
+        _decimal(txn.exchange_rate),
+        txn.raw,
+    )
+
+def _credit_key(txn: CreditTransaction) -> tuple:
+    return (txn.transaction_date, txn.posting_date, txn.description, txn.credit, txn.debit)
+
+def _credit_row_key(row: list) -> tuple:
+    return (date.fromisoformat(row[0]), date.fromisoformat(row[1]), row[2], row[3], row[4])
+
+def _merge_credit_csv(output_file: str, exported: List[dict], new_txns: List[CreditTransaction]):
+    """
+    Add new_txns (sorted by transaction date) to an existing, date-sorted credit CSV.
+    When they all fall on or after the last exported date they are simply appended;
+    otherwise the existing rows and the new ones are merged as two sorted runs.
+    """
+    last_exported = max((entry['last'] for entry in exported if entry['last']), default='')
+    new_rows = map(_credit_csv_row, new_txns)
+    if new_txns[0].transaction_date.strftime('%Y-%m-%d') >= last_exported:
+        _write_csv_with_retry(output_file, lambda writer: writer.writerows(new_rows), mode='a')
+        return
+
+    tmp_path = f"{output_file}.{os.getpid()}.tmp"
+    with open(output_file, newline='') as existing:
+        reader = csv.reader(existing)
+        header = next(reader, credit_csv_header)
+
+        def _merge(writer: csv.writer):
+            writer.writerow(header)
+            writer.writerows(heapq.merge(reader, new_rows, key=operator.itemgetter(0)))
+
+        _write_csv_with_retry(tmp_path, _merge)
+    _replace_with_retry(tmp_path, output_file)
+
+def process_credit_statements(input_files: List[str], output_file: str, jobs: int = 1,
+                              cache_dir: Optional[str] = None, incremental: bool = False,
+                              fmt: str = 'csv'):
+    exported = _load_export_index(output_file) if incremental else None
+    if exported is not None:
+        new_files, changed = _split_new_statements(input_files, exported)
+        if changed:
+            print(f"Some statements exported to '{output_file}' have changed; rebuilding it.")
+            exported = None
+        else:
+            input_files = new_files
+
+    # A serial run skips copies before parsing them; worker processes cannot share the digests
+    # seen so far, so there copies are dropped by the index as results are collected
+    parse_file = functools.partial(_parse_credit_file, cache_dir=cache_dir,
+                                   digests={} if jobs <= 1 else None)
+    seed = functools.partial(_exported_keys, output_file, exported, _credit_row_key) if exported is not None else None
+    index = _TransactionIndex(_credit_key, operator.attrgetter('transaction_date'), seed)
+    per_file = []
+    for input_file, statement in zip(input_files, _map_files(parse_file, input_files, jobs)):
+        file_txns = index.add(input_file, statement)
+        if file_txns is not None:
+            per_file.append((input_file, statement, file_txns))
+    txns = [txn for _, _, file_txns in per_file for txn in file_txns]
+    index.report(output_file)
+    txns.sort(key=operator.attrgetter('transaction_date'))
+
+    entries = []
+    if incremental:
+        for input_file, statement, file_txns in per_file:
+            dates = [txn.transaction_date.strftime('%Y-%m-%d') for txn in statement.transactions]
+            entries.append(_export_entry(input_file, statement.account, min(dates, default=None),
+                                         max(dates, default=None), len(file_txns)))
+
+    if exported is not None:
+        if txns:
+            print(f"Adding {len(txns)} new credit transactions to '{output_file}'.")
+            _merge_credit_csv(output_file, exported, txns)
+        else:
+            print(f"No new credit transactions. '{output_file}' is up to date.")
+        _save_export_index(output_file, exported + entries)
+        return
 
     # Only write the CSV if at least one transaction was parsed successfully
-    if txns:
+    if txns and fmt != 'csv':
+        _write_table(output_file, fmt, credit_columns, map(_credit_typed_row, txns))
+    elif txns:
         def _write_credit(writer: csv.writer):
-            writer.writerow([
-                'Transaction Date',
-                'Posting Date',
-                'Description',
-                'Credit',
-                'Debit',
-                'Amount Foreign Currency',
-                'Foreign Currency',
-                'Exchange Rate',
-                'Raw',
-            ])
-            for txn in txns:
-                writer.writerow([
-                    txn['transaction_date'].strftime('%Y-%m-%d'),
-                    txn['posting_date'].strftime('%Y-%m-%d'),
-                    txn['description'],
-                    txn['credit'],
-                    txn['debit'],
-                    txn['amount_foreign'],
-                    txn['foreign_currency'],
-                    txn['exchange_rate'],
-                    txn['raw'],
-                ])
+            writer.writerow(credit_csv_header)
+            writer.writerows(map(_credit_csv_row, txns))
 
         _write_csv_with_retry(output_file, _write_credit)
+        if incremental:
+            _save_export_index(output_file, entries)
     else:
         print(f"No credit transactions detected. Not creating '{output_file}'.")
 
-def process_chequing_statements(input_files: List[str], output_file: str):
-    csv_rows = []
+class NotAStatementError(ValueError):
+    """Raised while reading a file that is not a statement of the requested kind."""
 
-    for input_file in input_files:
-        root = _get_xml_root(input_file)
-        rows = []
-
-        continue_input_loop = False
-        for i_tag, tag in enumerate(root[0][1]):
-            if i_tag > 10:
-                continue_input_loop = True
-                break
-            if font := tag.get("font"):
-                if font.endswith("MetaBoldLF-Roman") or font.endswith("Utopia-Bold"):
-                    break
-        
-        if continue_input_loop:
-            print(f"Skipping {input_file}...")
-            continue
+def _chequing_blocks(input_file: str):
+    """
+    Extract the text blocks of a chequing/savings statement.
+    Returns (page_count, blocks), or None if the file does not look like a chequing statement.
+    """
+    return _blocks_from_pages(_profile_iter('extract', _iter_pages(input_file)))
 
-        print(f'Processing {input_file}...')
+def _blocks_from_pages(pages: Iterable[PageLayout]):
+    """Build chequing blocks from page records; see _chequing_blocks."""
+    blocks = []
+    page_count = 0
+    try:
+        for page_blocks in _iter_page_blocks(pages):
+            page_count += 1
+            blocks.extend(page_blocks)
+    except NotAStatementError:
+        return None
+    return page_count, blocks
 
-        blocks = []
-        pages = set()
-        for page_num, page in enumerate(root):
-            pages.add(page_num)
-            figure = page[1]
-            text = ''
-            last_x = None
+def _iter_page_blocks(pages: Iterable[PageLayout]) -> Iterator[List[Block]]:
+    """
+    Yield the blocks of each page of a chequing/savings statement. Raises NotAStatementError
+    on the first page if it lacks the statement's bold header font.
+    """
+    for page in pages:
+        profile_count('pages')
+        profile_count('segments', len(page.chars))
+        if page.number == 0 and len(page.figure) > 11 and not _has_chequing_header_font(page):
+            raise NotAStatementError("not a chequing or savings statement")
+        with profile_stage('group'):
+            page_blocks = _page_blocks(page)
+        profile_count('blocks', len(page_blocks))
+        yield page_blocks
+
+def _page_blocks(page: PageLayout) -> List[Block]:
+    """Split the figure of one statement page into text blocks (table cells and labels)."""
+    blocks = []
+    page_num = page.number
+    text = ''
+    last_x = None
+    last_x2 = None
+    block_x = None
+    width = 0
+    seen_text = False
+    for tag in page.figure:
+        clear_text = False
+        append_block = ""
+        if tag is not None:
+            seen_text = True
+            font = tag.font
+            if font:
+                font = font.split("+")[1]
+            size = tag.size
+            x_pos = tag.x
+            y_pos = tag.y
+            x2_pos = tag.x2
+
+            if last_x2 is not None:
+                if x_pos - last_x2 > 5:
+                    append_block = text
+                    text = ""
+                    width = 0
+                elif (x_pos - last_x2) > 0.7:
+                    text += " "
+            last_x = x_pos
+            last_x2 = x2_pos
+            width += size
+            if font in (font_txn, font_header):
+                text += tag.text
+            if block_x is None:
+                block_x = x_pos
+        elif text != '':
+            if seen_text:
+                append_block = text
+            seen_text = False
+            clear_text = True
+            width = 0
             last_x2 = None
+        
+        if append_block:
+            block = Block(page_num, block_x, x2_pos, y_pos, append_block.strip())
+            blocks.append(block)
             block_x = None
-            width = 0
-            seen_text = False
-            for tag in figure:
-                clear_text = False
-                append_block = ""
-                if tag.tag == 'text':
-                    seen_text = True
-                    font = tag.attrib.get("font")
-                    if font:
-                        font = font.split("+")[1]
-                    size = float(tag.attrib['size'])
-                    x_pos = float(tag.attrib["bbox"].split(",")[0])
-                    y_pos = float(tag.attrib["bbox"].split(",")[1])
-                    x2_pos = float(tag.attrib["bbox"].split(",")[2])
-
-                    if last_x2 is not None:
-                        if x_pos - last_x2 > 5:
-                            append_block = text
-                            text = ""
-                            width = 0
-                        elif (x_pos - last_x2) > 0.7:
-                            text += " "
-                    last_x = x_pos
-                    last_x2 = x2_pos
-                    width += size
-                    if font in (font_txn, font_header):
-                        text += tag.text
-                    if block_x is None:
-                        block_x = x_pos
-                elif tag.tag != 'text' and text != '':
-                    if seen_text:
-                        append_block = text
-                    seen_text = False
-                    clear_text = True
-                    width = 0
-                    last_x2 = None
-                
-                if append_block:
-                    block = Block(page_num, block_x, x2_pos, y_pos, append_block.strip())
-                    blocks.append(block)
-                    block_x = None
-
-                if clear_text:
-                    text = ''
-
-        open_balance_parts = [b.text for b in blocks if b.text.startswith("Your opening balance")][0].split(" ")[-3:]
-        open_balance_date = parse(" ".join(open_balance_parts))
-        start_year = int(open_balance_parts[2])
-
-        header_sets = []
-        for page in pages:
-            page_blocks = [b for b in blocks if b.page == page]
-            end_of_header_index = 0
-
-            for i, block in enumerate(page_blocks):
-                if block.text == "Date":
-                    if other_blocks := page_blocks[i+1:i+5]:
-                        header_sets.append([block, *other_blocks])
-                        end_of_header_index = i + 4
-
-            page_blocks = [block for i, block in enumerate(page_blocks) if i > end_of_header_index]
-
-            if len(header_sets) <= page:
-                break
-
-            cell_pos = 0
-            i = 0
-            block_pos = 0
-            row = []
-            last_date = None
-
-            while block_pos < len(page_blocks):
-                row_pos = 0
-                block = page_blocks[block_pos]
-                block_consumed = False
-
-                headers = header_sets[block.page]
-
-                mid_point = (block.x2 - block.x) / 2 + block.x
-                for header in headers:
-                    if mid_point > header.x and mid_point < header.x2:
-                        row_pos = headers.index(header)
-
-                if i % 5 == row_pos:
-                    if i % 5 == 0:
-                        date = parse(f"{block.text} {start_year}")
-
-                        if date < open_balance_date:
-                            date = parse(f"{block.text} {start_year+1}")
-                        block.text = str(date.date())
-                        if block.text.strip():
-                            last_date = block.text
-                    block_consumed = True
-                    row.append(block.text)
-                elif i % 5 == 0 and page_blocks[block_pos].text == "Opening Balance":
-                    row.append(str(open_balance_date.date()))
-                elif last_date and i % 5 == 0:
-                    row.append(last_date)
-                else:
-                    row.append("")
-                if i % 5 == 4:
-                    csv_rows.append(row)
-                    row = []
-                if block_consumed:
-                    block_pos += 1
-                i += 1
-
-    def _write_chequing(writer: csv.writer):
-        writer.writerow([
-            "Date",
-            "Description",
-            "Withdrawls",
-            "Deposits",
-            "Balance"
-        ])
-
-        for row in csv_rows:
-            if "Opening Balance" in row:
-                description = "Opening Balance"
-                deposits = ""
-                withdrawals = ""
+
+        if clear_text:
+            text = ''
+
+    return blocks
+
+# Page sharding: with more workers than statements, a long chequing/savings PDF is split into
+# contiguous page ranges that are laid out in parallel. Pages are independent until header
+# detection and date carry-over, which _chequing_transactions does afterwards in page order.
+# Each worker gets at least page_shard_pages pages so process start-up stays worthwhile.
+page_shard_pages = 8
+
+def _chequing_shard_blocks(input_file: str, page_numbers: range) -> Optional[List[List[Block]]]:
+    """The blocks of each page in page_numbers, or None if page 0 shows it is not a statement."""
+    try:
+        return list(_iter_page_blocks(_profile_iter('extract', _pdf_pages(input_file, page_numbers=page_numbers))))
+    except NotAStatementError:
+        return None
+
+def _profiled_shard(input_file: str, page_numbers: range, enabled: bool):
+    # A worker process may run several shards of the same file; report each shard on its own
+    _profile_stats.pop(input_file, None)
+    return _profiled(functools.partial(_chequing_shard_blocks, page_numbers=page_numbers), input_file, enabled)
+
+def _page_shards(input_file: str, jobs: int) -> List[range]:
+    """
+    The page ranges a statement is split into for up to jobs workers, or [] if it is too short
+    to split (or is XML, which is streamed rather than laid out).
+    """
+    if jobs < 2 or not input_file.lower().endswith('.pdf'):
+        return []
+    try:
+        page_count = _pdf_page_count(input_file) or 0
+    except OSError:
+        return []
+    shards = min(jobs, page_count // page_shard_pages)
+    if shards < 2:
+        return []
+    starts = [page_count * i // shards for i in range(shards)]
+    # The last shard runs to the end in case the page tree's count is short
+    return [range(start, stop) for start, stop in zip(starts, starts[1:] + [sys.maxsize])]
+
+def _sharded_chequing_blocks(input_file: str, jobs: int):
+    """_chequing_blocks, extracting a long PDF's pages in up to jobs worker processes."""
+    ranges = _page_shards(input_file, jobs)
+    if not ranges:
+        return _chequing_blocks(input_file)
+    shards = len(ranges)
+
+    from concurrent.futures import ProcessPoolExecutor
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=shards) as executor:
+        outputs = list(executor.map(_profiled_shard, itertools.repeat(input_file), ranges,
+                                    itertools.repeat(_profile_enabled)))
+    stack = _profile_thread().stack
+    if _profile_enabled and stack:
+        # The workers' stages are merged below; keep the wait out of the enclosing stage
+        stack[-1][2] += time.perf_counter() - started
+
+    blocks = []
+    pages = 0
+    for shard_pages, stats, events in outputs:
+        _merge_profile(input_file, stats, events)
+        if shard_pages is None:
+            return None
+        pages += len(shard_pages)
+        for page_blocks in shard_pages:
+            blocks.extend(page_blocks)
+    return pages, blocks
+
+def _encode_blocks(parsed):
+    if parsed is None:
+        return None
+    page_count, blocks = parsed
+    return [page_count, [[b.page, b.x, b.x2, b.y, b.text] for b in blocks]]
+
+def _decode_blocks(data):
+    if data is None:
+        return None
+    page_count, blocks = data
+    return page_count, [Block(*b) for b in blocks]
+
+def _header_column(headers: List[Block], mid_point: float) -> int:
+    """Index of the last header whose span strictly contains mid_point, or 0 if none does."""
+    row_pos = 0
+    for pos, header in enumerate(headers):
+        if mid_point > header.x and mid_point < header.x2:
+            row_pos = pos
+    return row_pos
+
+def _column_lookup(headers: List[Block]):
+    """
+    Build a bisect-based replacement for _header_column(headers, mid_point).
+    The header edges split the axis into elementary intervals; the answer is precomputed for
+    each edge and for the open interval after it, so a lookup is one bisect instead of a scan.
+    """
+    edges = sorted({edge for header in headers for edge in (header.x, header.x2)})
+    at_edge = [_header_column(headers, edge) for edge in edges]
+    # Any point strictly between two edges gives the same answer as every other such point
+    after_edge = [_header_column(headers, (lo + hi) / 2) for lo, hi in zip(edges, edges[1:])] + [0]
+
+    def lookup(mid_point: float) -> int:
+        pos = bisect.bisect_left(edges, mid_point)
+        if pos < len(edges) and edges[pos] == mid_point:
+            return at_edge[pos]
+        return after_edge[pos - 1] if pos else 0
+    return lookup
+
+re_day_month = re.compile(r'^(?:(?P<day>\d{1,2}) (?P<mon>[A-Za-z]{3})|(?P<mon2>[A-Za-z]{3}) (?P<day2>\d{1,2}))$')
+
+def _chequing_date_resolver(open_balance_date: datetime, start_year: int):
+    """
+    Build resolve(text) -> 'YYYY-MM-DD' for the date cells of one chequing statement.
+    A cell is read in the opening balance year, or the next year if that would fall before the
+    opening balance (statements crossing Dec -> Jan). "DD Mon"/"Mon DD" cells are computed directly;
+    anything else goes through dateutil as before. Results are cached per cell text.
+    """
+    cache = {}
+
+    def resolve_slow(text: str) -> datetime:
+        date = parse(f"{text} {start_year}")
+        if date < open_balance_date:
+            date = parse(f"{text} {start_year+1}")
+        return date
+
+    def resolve(text: str) -> str:
+        if text in cache:
+            return cache[text]
+        m = re_day_month.match(text)
+        month = month_numbers.get((m.group('mon') or m.group('mon2')).upper()) if m else None
+        if month:
+            day = int(m.group('day') or m.group('day2'))
+            try:
+                date = datetime(start_year, month, day)
+                if date < open_balance_date:
+                    date = datetime(start_year + 1, month, day)
+            except ValueError:
+                # Out-of-range day: let dateutil raise (or resolve) exactly as it always did
+                date = resolve_slow(text)
+        else:
+            date = resolve_slow(text)
+        cache[text] = result = sys.intern(str(date.date()))
+        return result
+    return resolve
+
+class ChequingTransaction(NamedTuple):
+    """One row of a chequing/savings statement; amounts are the statement's text, e.g. '1,234.56'."""
+    date: Optional[date]
+    description: str
+    withdrawals: str
+    deposits: str
+    balance: str
+
+def _chequing_transactions(pages: Iterable[List[Block]]) -> Iterator[ChequingTransaction]:
+    """
+    Assign a statement's blocks, given page by page, to Date/Description/Withdrawals/Deposits/Balance
+    rows. Pages are only held back until the opening balance (which fixes the statement's years) is
+    found, normally on the first page; reading stops at the first page without a column header.
+    """
+    pages = iter(pages)
+    buffered = []
+    open_balance = None
+    for page_blocks in pages:
+        buffered.append(page_blocks)
+        open_balance = next((b.text for b in page_blocks if b.text.startswith("Your opening balance")), None)
+        if open_balance is not None:
+            break
+    if open_balance is None:
+        raise NotAStatementError("no opening balance found")
+
+    open_balance_parts = open_balance.split(" ")[-3:]
+    open_balance_date = parse(" ".join(open_balance_parts))
+    start_year = int(open_balance_parts[2])
+    resolve_date = _chequing_date_resolver(open_balance_date, start_year)
+    dates = {'': None}
+
+    def as_date(text: str) -> Optional[date]:
+        if text not in dates:
+            dates[text] = date.fromisoformat(text)
+        return dates[text]
+
+    header_sets = []
+    column_lookups = {}
+
+    def page_transactions(page: int, page_blocks: List[Block]) -> Optional[List[ChequingTransaction]]:
+        """The rows of one page, or None once a page has no column header (past the table)."""
+        txns = []
+        end_of_header_index = 0
+
+        for i, block in enumerate(page_blocks):
+            if block.text == "Date":
+                if other_blocks := page_blocks[i+1:i+5]:
+                    header_sets.append([block, *other_blocks])
+                    end_of_header_index = i + 4
+
+        page_blocks = page_blocks[end_of_header_index + 1:]
+
+        if len(header_sets) <= page:
+            return None
+
+        i = 0
+        block_pos = 0
+        row = []
+        last_date = None
+
+        while block_pos < len(page_blocks):
+            block = page_blocks[block_pos]
+            block_consumed = False
+
+            if block.page not in column_lookups:
+                column_lookups[block.page] = _column_lookup(header_sets[block.page])
+            mid_point = (block.x2 - block.x) / 2 + block.x
+            row_pos = column_lookups[block.page](mid_point)
+
+            if i % 5 == row_pos:
+                if i % 5 == 0:
+                    block.text = resolve_date(block.text)
+                    if block.text.strip():
+                        last_date = block.text
+                block_consumed = True
+                # Dates and descriptions repeat heavily across a statement; share one copy of each
+                row.append(sys.intern(block.text) if i % 5 == 1 else block.text)
+            elif i % 5 == 0 and page_blocks[block_pos].text == "Opening Balance":
+                row.append(str(open_balance_date.date()))
+            elif last_date and i % 5 == 0:
+                row.append(last_date)
             else:
-                description = row[1]
-                deposits = row[2]
-                withdrawals = row[3]
+                row.append("")
+            if i % 5 == 4:
+                txns.append(ChequingTransaction(as_date(row[0]), row[1], row[2], row[3], row[4]))
+                row = []
+            if block_consumed:
+                block_pos += 1
+            i += 1
 
-            writer.writerow([
-                row[0],
-                description,
-                withdrawals,
-                deposits,
-                row[4]
-            ])
+        return txns
 
-    _write_csv_with_retry(output_file, _write_chequing)
+    for page, page_blocks in enumerate(itertools.chain(buffered, pages)):
+        with profile_stage('parse'):
+            txns = page_transactions(page, page_blocks)
+        if txns is None:
+            return
+        profile_count('transactions', len(txns))
+        yield from txns
 
-if __name__ == "__main__":
-    # If no arguments were provided, auto-discover PDFs in the current directory
-    if not input_files:
-        pdfs = []
-        # Match PDFs in current directory; on Windows glob is case-insensitive,
-        # so searching twice ("*.pdf" and "*.PDF") can create duplicates.
-        for pattern in ("*.pdf",):
-            pdfs.extend(glob.glob(os.path.join(os.getcwd(), pattern)))
-        # Deduplicate while preserving order
-        seen = set()
-        deduped = []
-        for p in pdfs:
-            key = os.path.normcase(os.path.abspath(p))
-            if key not in seen:
-                seen.add(key)
-                deduped.append(p)
-        pdfs = deduped
-        if not pdfs:
-            print("No input files provided and no .pdf files found in the current directory.")
-            print("Usage: python convert.py [optional files... (PDF or XML)]")
-            sys.exit(1)
-        input_files = pdfs
+def _blocks_by_page(page_count: int, blocks: List[Block]) -> List[List[Block]]:
+    # Bucket blocks by page once instead of filtering the whole list for every page
+    blocks_by_page = [[] for _ in range(page_count)]
+    for b in blocks:
+        blocks_by_page[b.page].append(b)
+    return blocks_by_page
+
+def iter_chequing_transactions(path: str, cache_dir: Optional[str] = None,
+                               jobs: int = 1) -> Iterator[ChequingTransaction]:
+    """
+    Yield the rows of one chequing or savings statement (PDF, or pdfminer XML) in statement order,
+    starting with the opening balance. Pages are read lazily as the iterator is consumed. With
+    cache_dir, the statement's blocks are read from (or stored in) the command line tool's parse
+    cache instead. With jobs > 1, the pages of a long PDF are extracted up front in that many
+    worker processes. Raises NotAStatementError if the file is not a chequing/savings statement.
+    """
+    yield from _chequing_transactions(_chequing_pages(path, cache_dir, jobs))
+
+def _chequing_pages(path: str, cache_dir: Optional[str] = None, jobs: int = 1) -> Iterable[List[Block]]:
+    extract = _chequing_blocks if jobs <= 1 else functools.partial(_sharded_chequing_blocks, jobs=jobs)
+    if cache_dir or jobs > 1:
+        with profile_stage('cache' if cache_dir else 'extract'):
+            parsed = _cached(cache_dir, 'chequing', path, extract, _encode_blocks, _decode_blocks)
+        if parsed is None:
+            raise NotAStatementError("not a chequing or savings statement")
+        return _blocks_by_page(*parsed)
+    return _iter_page_blocks(_profile_iter('extract', _iter_pages(path)))
+
+def _parse_chequing_file(input_file: str, cache_dir: Optional[str] = None, jobs: int = 1,
+                         digests: Optional[dict] = None) -> _ParsedStatement:
+    """
+    Parse one statement for process_chequing_statements; with digests (see _is_copy), an input
+    with the same contents as an earlier one is skipped without being parsed.
+    """
+    digest = _file_digest(input_file)
+    if _is_copy(input_file, digest, digests):
+        return _ParsedStatement(digest, None, None)
+    print(f'Processing {input_file}...')
+    first_page = []
+    try:
+        pages = _tap_first_page(_chequing_pages(input_file, cache_dir, jobs), first_page)
+        rows = list(_chequing_transactions(pages))
+    except NotAStatementError as e:
+        print(f"Skipping {input_file}: {e}")
+        return _ParsedStatement(digest, None, [])
+    return _ParsedStatement(digest, _statement_account(block.text for block in first_page), rows)
+
+chequing_csv_header = [
+    "Date",
+    "Description",
+    "Withdrawls",
+    "Deposits",
+    "Balance"
+]
+
+def _chequing_csv_row(txn: ChequingTransaction) -> list:
+    if "Opening Balance" in txn:
+        description = "Opening Balance"
+        deposits = ""
+        withdrawals = ""
+    else:
+        # The CSV has always written the statement's withdrawals column under Deposits and
+        # its deposits column under Withdrawls; kept so existing exports stay comparable
+        description = txn.description
+        deposits = txn.withdrawals
+        withdrawals = txn.deposits
 
+    return [
+        txn.date.isoformat() if txn.date else '',
+        description,
+        withdrawals,
+        deposits,
+        txn.balance
+    ]
+
+chequing_columns = [
+    ('Date', 'date', None),
+    ('Description', 'string', None),
+    ('Withdrawls', 'decimal', 2),
+    ('Deposits', 'decimal', 2),
+    ('Balance', 'decimal', 2),
+]
+
+def _chequing_typed_row(txn: ChequingTransaction) -> tuple:
+    _, description, withdrawals, deposits, balance = _chequing_csv_row(txn)
+    return (txn.date, description, _decimal(withdrawals), _decimal(deposits), _decimal(balance))
+
+def _chequing_key(txn: ChequingTransaction) -> tuple:
+    # Keyed by the CSV row so rows read back from an exported CSV compare equal
+    return tuple(_chequing_csv_row(txn))
+
+def _merge_chequing_csv(output_file: str, exported: List[dict], new_runs: List[tuple]):
+    """
+    Add new statements to an existing chequing CSV, keeping statements ordered by their first
+    date. new_runs holds (entry, rows) pairs sorted by first date. Statements that start after
+    every exported one are appended; otherwise the file is rewritten once, copying each exported
+    statement's rows (known from the index row counts) and inserting the new runs between them.
+    Returns the index entries in their new file order.
+    """
+    last_first = max((entry['first'] for entry in exported if entry['first']), default='')
+    if (new_runs[0][0]['first'] or '') >= last_first:
+        def _append(writer: csv.writer):
+            for _, rows in new_runs:
+                writer.writerows(map(_chequing_csv_row, rows))
+        _write_csv_with_retry(output_file, _append, mode='a')
+        return exported + [entry for entry, _ in new_runs]
+
+    merged = []
+    tmp_path = f"{output_file}.{os.getpid()}.tmp"
+    with open(output_file, newline='') as existing:
+        reader = csv.reader(existing)
+        header = next(reader, chequing_csv_header)
+
+        def _merge(writer: csv.writer):
+            writer.writerow(header)
+            pending = collections.deque(new_runs)
+            for entry in exported:
+                while pending and entry['first'] and (pending[0][0]['first'] or '') < entry['first']:
+                    new_entry, rows = pending.popleft()
+                    writer.writerows(map(_chequing_csv_row, rows))
+                    merged.append(new_entry)
+                writer.writerows(itertools.islice(reader, entry['rows']))
+                merged.append(entry)
+            for new_entry, rows in pending:
+                writer.writerows(map(_chequing_csv_row, rows))
+                merged.append(new_entry)
+
+        _write_csv_with_retry(tmp_path, _merge)
+    _replace_with_retry(tmp_path, output_file)
+    return merged
+
+def process_chequing_statements(input_files: List[str], output_file: str, jobs: int = 1,
+                                cache_dir: Optional[str] = None, incremental: bool = False,
+                                fmt: str = 'csv'):
+    exported = _load_export_index(output_file) if incremental else None
+    if exported is not None:
+        new_files, changed = _split_new_statements(input_files, exported)
+        if changed:
+            print(f"Some statements exported to '{output_file}' have changed; rebuilding it.")
+            exported = None
+        else:
+            input_files = new_files
+
+    # With fewer statements than workers and at least one long enough to split, the workers split
+    # the long statements by page instead; otherwise each worker parses whole statements
+    file_jobs, page_jobs = jobs, 1
+    if len(input_files) < jobs and any(_page_shards(f, jobs) for f in input_files):
+        file_jobs, page_jobs = 1, jobs
+    parse_file = functools.partial(_parse_chequing_file, cache_dir=cache_dir, jobs=page_jobs,
+                                   digests={} if file_jobs <= 1 else None)
+    # Rows keep their statement order, so a full CSV is written by the pipeline's writer thread
+    # while the following statements are still being parsed
+    stream = None
+    if exported is None and fmt == 'csv':
+        stream = _CsvStream(output_file, chequing_csv_header, _chequing_csv_row)
+    seed = functools.partial(_exported_keys, output_file, exported, tuple) if exported is not None else None
+    index = _TransactionIndex(_chequing_key, operator.attrgetter('date'), seed)
+    per_file = []
+
+    # Called in statement order, so copies and rows already read from an earlier statement are
+    # dropped before they are written
+    def _consume(input_file: str, statement: _ParsedStatement):
+        file_rows = index.add(input_file, statement)
+        if file_rows is None:
+            return
+        per_file.append((input_file, statement, file_rows))
+        if stream:
+            stream.write(input_file, file_rows)
+
+    try:
+        _map_files(parse_file, input_files, file_jobs, _consume)
+    except BaseException:
+        if stream:
+            stream.discard()
+        raise
+    csv_rows = [row for _, _, file_rows in per_file for row in file_rows]
+    index.report(output_file)
+
+    entries = []
+    if incremental:
+        for input_file, statement, file_rows in per_file:
+            dates = [row.date.isoformat() for row in statement.transactions if row.date]
+            entries.append(_export_entry(input_file, statement.account, dates[0] if dates else None,
+                                         dates[-1] if dates else None, len(file_rows)))
+
+    if exported is not None:
+        new_runs = sorted(((entry, rows) for entry, (_, _, rows) in zip(entries, per_file) if rows),
+                          key=lambda run: run[0]['first'] or '')
+        if new_runs:
+            print(f"Adding {len(csv_rows)} new rows to '{output_file}'.")
+            exported = _merge_chequing_csv(output_file, exported, new_runs)
+        else:
+            print(f"No new statements. '{output_file}' is up to date.")
+        # Statements that produced no rows are recorded so they are not parsed again
+        _save_export_index(output_file, exported + [entry for entry in entries if not entry['rows']])
+        return
+
+    if fmt != 'csv':
+        _write_table(output_file, fmt, chequing_columns, map(_chequing_typed_row, csv_rows))
+        return
+
+    stream.commit()
+    if incremental:
+        _save_export_index(output_file, entries)
+
+def _group_statements(input_files: List[str], classify=None) -> dict:
+    """
+    Split input files into {'visa': [...], 'chequing': [...], 'savings': [...]} by filename,
+    classifying the rest from their first page (classify defaults to _classify_statement).
+    """
+    classify = classify or _classify_statement
     # Narrow down to visa/chequing/savings by filename when possible, otherwise try both processors gracefully
     credit_files = [f for f in input_files if "visa" in os.path.basename(f).lower()]
     chequing_files = [f for f in input_files if "chequing" in os.path.basename(f).lower()]
     # Savings statements share the chequing layout but write to their own CSV
     savings_files = [f for f in input_files if "savings" in os.path.basename(f).lower()]
 
-    # If nothing matched the patterns, be permissive and attempt to classify by structure
+    # Anything else is classified from its first page and then parsed exactly once with its group
     other_files = [f for f in input_files if f not in credit_files + chequing_files + savings_files]
+    groups = {'visa': credit_files, 'chequing': chequing_files, 'savings': savings_files}
     for f in other_files:
-        # Heuristic: try both, catching errors and proceeding
         try:
-            process_credit_statements([f], output_file_credit)
+            kind = classify(f)
         except Exception:
-            try:
-                process_chequing_statements([f], output_file_chequing)
-            except Exception:
-                print(f"Skipping unrecognized file type/format: {f}")
+            kind = 'unknown'
+        if kind in groups:
+            groups[kind].append(f)
+        else:
+            print(f"Skipping unrecognized file type/format: {f}")
+    return groups
 
-    if credit_files:
-        process_credit_statements(credit_files, output_file_credit)
+def _convert_groups(groups: dict, jobs: int = 1, cache_dir: Optional[str] = None,
+                    incremental: bool = False, fmt: str = 'csv'):
+    """Write the output file of each statement group from _group_statements."""
+    # Output writes are attributed to the output file; parsing is attributed to each statement
+    outputs = {kind: _output_path(output_file, fmt) for kind, output_file in
+               (('visa', output_file_credit), ('chequing', output_file_chequing), ('savings', output_file_savings))}
+    if groups['visa']:
+        with _ProfileTarget(outputs['visa']):
+            process_credit_statements(groups['visa'], outputs['visa'], jobs, cache_dir, incremental, fmt)
 
-    if chequing_files:
-        process_chequing_statements(chequing_files, output_file_chequing)
+    if groups['chequing']:
+        with _ProfileTarget(outputs['chequing']):
+            process_chequing_statements(groups['chequing'], outputs['chequing'], jobs, cache_dir, incremental, fmt)
+
+    if groups['savings']:
+        with _ProfileTarget(outputs['savings']):
+            process_chequing_statements(groups['savings'], outputs['savings'], jobs, cache_dir, incremental, fmt)
+
+def _find_pdfs(directory: str) -> List[str]:
+    pdfs = []
+    # Match PDFs in the directory; on Windows glob is case-insensitive,
+    # so searching twice ("*.pdf" and "*.PDF") can create duplicates.
+    for pattern in ("*.pdf",):
+        pdfs.extend(glob.glob(os.path.join(directory, pattern)))
+    # Deduplicate while preserving order
+    seen = set()
+    deduped = []
+    for p in pdfs:
+        key = os.path.normcase(os.path.abspath(p))
+        if key not in seen:
+            seen.add(key)
+            deduped.append(p)
+    return deduped
+
+# Watch mode: a file is converted once its size and mtime have stayed the same for
+# watch_settle_seconds (so statements still being copied or downloaded are left alone).
+watch_poll_seconds = 2.0
+watch_settle_seconds = 5.0
+
+def watch_directory(directory: str, jobs: int = 1, cache_dir: Optional[str] = None,
+                    poll: float = watch_poll_seconds, settle: float = watch_settle_seconds):
+    """
+    Keep converting new or changed PDFs in directory until interrupted (Ctrl+C). Each round of
+    settled changes updates the output CSVs incrementally, as with --incremental.
+    """
+    converted = {}  # path -> (size, mtime) when last converted
+    failed = {}     # path -> (size, mtime) of a version that could not be converted
+    pending = {}    # path -> ((size, mtime), first seen with that signature)
+    kinds = {}      # (path, size, mtime) -> classification of files without a telling name
+
+    def classify(path):
+        st = os.stat(path)
+        key = (path, st.st_size, st.st_mtime)
+        if key not in kinds:
+            kinds[key] = _classify_statement(path)
+        return kinds[key]
+
+    print(f"Watching '{directory}' for statements every {poll:g}s (Ctrl+C to stop)...")
+    try:
+        while True:
+            now = time.monotonic()
+            signatures = {}
+            for path in _find_pdfs(directory):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # removed since it was listed
+                signatures[path] = (st.st_size, st.st_mtime)
+
+            for path, signature in signatures.items():
+                if signature in (converted.get(path), failed.get(path)) or not signature[0]:
+                    pending.pop(path, None)
+                elif path not in pending or pending[path][0] != signature:
+                    pending[path] = (signature, now)
+            for path in list(pending):
+                if path not in signatures:
+                    del pending[path]
+
+            ready = [path for path, (_, since) in pending.items() if now - since >= settle]
+            if ready:
+                # Pass every settled statement: the export index skips the ones already written
+                # and still notices when one of them has been replaced. Files that failed are
+                # left out until they change.
+                settled = [path for path, signature in signatures.items()
+                           if (path not in pending or path in ready) and failed.get(path) != signature]
+                print(f"{len(ready)} new or changed statement(s) in '{directory}'.")
+                try:
+                    _convert_groups(_group_statements(settled, classify), jobs, cache_dir, incremental=True)
+                    done = ready
+                except Exception as e:
+                    print(f"Error converting statements: {e}")
+                    # Convert the new statements one at a time so a bad file does not hold up the rest
+                    done = []
+                    for path in ready:
+                        try:
+                            _convert_groups(_group_statements([path], classify), jobs, cache_dir, incremental=True)
+                            done.append(path)
+                        except Exception as e:
+                            print(f"Error converting {path} (retried once it changes): {e}")
+                for path in ready:
+                    signature = pending.pop(path)[0]
+                    if path in done:
+                        converted[path] = signature
+                        failed.pop(path, None)
+                    else:
+                        failed[path] = signature
+            time.sleep(poll)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+# Dry run (--dry-run/--list): report what a conversion would do without extracting any text.
+# Page counts come from the PDF trailer and page tree, the kind from the filename and the cache
+# status from the content hash, so neither pdfminer nor dateutil is imported.
+re_pdf_root = re.compile(rb'/Root\s+(\d+)\s+(\d+)\s+R')
+re_pdf_pages = re.compile(rb'/Pages\s+(\d+)\s+(\d+)\s+R')
+re_pdf_count = re.compile(rb'/Count\s+(\d+)(?!\d)(?!\s+\d+\s+R)')
+
+def _pdf_object(data: bytes, num: bytes, gen: bytes) -> Optional[bytes]:
+    """The body of the last (most recently updated) definition of object num gen, if uncompressed."""
+    start = None
+    for m in re.finditer(rb'(?<!\d)' + num + rb'\s+' + gen + rb'\s+obj\b', data):
+        start = m.end()
+    if start is None:
+        return None
+    end = data.find(b'endobj', start)
+    return data[start:end if end >= 0 else len(data)]
+
+def _pdf_page_count(path: str) -> Optional[int]:
+    """
+    Number of pages in a PDF: trailer /Root -> catalog /Pages -> page tree /Count. When the
+    catalog sits in a compressed object stream, pdfminer's document reader (no layout
+    analysis) resolves the same chain. Returns None if the count cannot be read.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    roots = re_pdf_root.findall(data)
+    catalog = _pdf_object(data, *roots[-1]) if roots else None
+    pages = re_pdf_pages.search(catalog) if catalog else None
+    tree = _pdf_object(data, *pages.groups()) if pages else None
+    count = re_pdf_count.search(tree) if tree else None
+    if count:
+        return int(count.group(1))
+
+    try:
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdftypes import resolve1
+        document = PDFDocument(PDFParser(io.BytesIO(data)))
+        return int(resolve1(resolve1(document.catalog['Pages'])['Count']))
+    except Exception:
+        return None
+
+def _xml_page_count(path: str) -> int:
+    with open(path, 'rb') as f:
+        return f.read().count(b'<page ')
+
+def _kind_from_name(path: str) -> str:
+    name = os.path.basename(path).lower()
+    return next((kind for kind in ('visa', 'chequing', 'savings') if kind in name), 'unknown')
+
+def _cache_status(cache_dir: Optional[str], kind: str, digest: str) -> str:
+    if not cache_dir:
+        return 'off'
+    cache_kinds = {'visa': ('credit',), 'chequing': ('chequing',), 'savings': ('chequing',)}
+    for cache_kind in cache_kinds.get(kind, ('credit', 'chequing')):
+        if os.path.exists(os.path.join(cache_dir, f"{cache_kind}-v{PARSER_VERSION}-{digest}.json")):
+            return 'hit'
+    return 'miss'
+
+def list_statements(input_files: List[str], cache_dir: Optional[str] = None, file=sys.stdout):
+    """Print each input's kind, page count and parse cache status, without parsing anything."""
+    counts = collections.Counter()
+    first_by_digest = {}
+    pages_total = 0
+    print(f"{'Kind':<9} {'Pages':>5}  {'Cache':<5}  File", file=file)
+    for input_file in input_files:
+        kind = _kind_from_name(input_file)
+        try:
+            digest = _file_digest(input_file)
+            if input_file.lower().endswith('.xml'):
+                pages = _xml_page_count(input_file)
+            else:
+                pages = _pdf_page_count(input_file)
+        except OSError as e:
+            print(f"{'error':<9} {'':>5}  {'':<5}  {input_file}: {e}", file=file)
+            continue
+        note = ''
+        if digest in first_by_digest:
+            note = f" (same contents as {first_by_digest[digest]}; skipped)"
+        else:
+            first_by_digest[digest] = input_file
+            counts[kind] += 1
+            pages_total += pages or 0
+        print(f"{kind:<9} {pages if pages is not None else '?':>5}  "
+              f"{_cache_status(cache_dir, kind, digest):<5}  {input_file}{note}", file=file)
+
+    summary = ', '.join(f"{counts[kind]} {kind}" for kind in ('visa', 'chequing', 'savings', 'unknown') if counts[kind])
+    print(f"{sum(counts.values())} statement(s), {pages_total} page(s): {summary or 'none'}", file=file)
+    if counts['unknown']:
+        print(f"{counts['unknown']} file(s) would be classified from their first page.", file=file)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert RBC Visa, Chequing and Savings statements to CSV.")
+    parser.add_argument('input_files', nargs='*', help="PDF or XML statements (default: all PDFs in the current directory)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="parse statements in N worker processes (0 = one per CPU core, default: 1)")
+    parser.add_argument('--cache-dir', default=default_cache_dir,
+                        help=f"directory for cached parse results (default: {default_cache_dir})")
+    parser.add_argument('--no-cache', action='store_true', help="always re-parse every statement")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only add statements not already in the output CSVs (tracked in *.index.json)")
+    parser.add_argument('--format', choices=output_formats, default='csv',
+                        help="output format (default: csv); parquet and arrow keep real date and decimal "
+                             "types and need pyarrow, jsonl writes one JSON object per transaction")
+    parser.add_argument('--profile', action='store_true',
+                        help="print the time spent per stage and the pages/blocks/transactions handled, per file and in total")
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help="with --profile, also save a Chrome trace (PATH ending in .json) or a cProfile "
+                             "dump of the main process (any other PATH, read it with pstats)")
+    parser.add_argument('--watch', metavar='DIR',
+                        help="keep running and convert new or changed PDFs in DIR as they appear "
+                             "(output CSVs are updated incrementally)")
+    parser.add_argument('--dry-run', '--list', action='store_true', dest='dry_run',
+                        help="list each statement's kind, page count and cache status without converting anything")
+    parser.add_argument('--poll-interval', type=float, default=watch_poll_seconds, metavar='SECONDS',
+                        help=f"with --watch, how often to look for changes (default: {watch_poll_seconds:g})")
+    args = parser.parse_args()
+    if args.incremental and args.format != 'csv':
+        parser.error("--incremental only supports --format csv")
+    if args.watch and (args.input_files or args.format != 'csv'):
+        parser.error("--watch takes no input files and writes CSV")
+    if args.watch and args.dry_run:
+        parser.error("--dry-run cannot be combined with --watch")
+    if args.watch and not os.path.isdir(args.watch):
+        parser.error(f"--watch: '{args.watch}' is not a directory")
+    input_files = args.input_files
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    # If no arguments were provided, auto-discover PDFs in the current directory
+    if not input_files and not args.watch:
+        pdfs = _find_pdfs(os.getcwd())
+        if not pdfs:
+            print("No input files provided and no .pdf files found in the current directory.")
+            print("Usage: python convert.py [--jobs N] [--no-cache] [--incremental] [--watch DIR] [optional files... (PDF or XML)]")
+            sys.exit(1)
+        input_files = pdfs
+
+    if args.dry_run:
+        list_statements(input_files, cache_dir)
+        sys.exit(0)
+
+    groups = _group_statements(input_files) if not args.watch else None
+
+    profiler = None
+    if args.profile:
+        enable_profiling()
+        if args.profile_output and not args.profile_output.lower().endswith('.json'):
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+    if args.watch:
+        watch_directory(args.watch, jobs, cache_dir, args.poll_interval)
+    else:
+        _convert_groups(groups, jobs, cache_dir, args.incremental, args.format)
 
-    if savings_files:
-        process_chequing_statements(savings_files, output_file_savings)
\ No newline at end of file
+    if args.profile:
+        print_profile()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_output)
+            print(f"cProfile statistics written to '{args.profile_output}'.")
+        elif args.profile_output:
+            write_profile_trace(args.profile_output)
+            print(f"Chrome trace written to '{args.profile_output}'.")
\ No newline at end of file